@@ -0,0 +1,99 @@
+import base64
+import hashlib
+import io
+import os
+import streamlit as st
+from PIL import Image, features
+
+LOGO_PATH = "logo.png"
+# Anzeigebreite des Logos in Pixeln
+LOGO_WIDTH = 200
+# 1x und 2x (HiDPI-Displays, z.B. Handys) werden vorab erzeugt
+LOGO_SCALES = (1, 2)
+# Ordner static/ neben der App, von Streamlit unter app/static/ ausgeliefert
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_URL = "app/static"
+
+
+@st.cache_resource(show_spinner=False)
+def source_file(path, mtime_ns, size):
+    # Datei nur einmal pro Prozess lesen; mtime/size im Schlüssel, damit ein ersetztes Logo neu gelesen wird.
+    # Liefert (Inhalts-Hash, Bytes)
+    with open(path, "rb") as f:
+        data = f.read()
+    return hashlib.sha256(data).hexdigest(), data
+
+
+@st.cache_resource(show_spinner=False)
+def image_variant(digest, width, _data):
+    # Verkleinerte, komprimierte Fassung; Schlüssel ist der Inhalts-Hash (nicht der Dateiname) plus Breite
+    image = Image.open(io.BytesIO(_data))
+    image.load()
+    if image.width > width:
+        height = round(image.height * width / image.width)
+        image = image.resize((width, height), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    if features.check("webp"):
+        # WebP behält die Transparenz und ist deutlich kleiner als PNG
+        image.save(buffer, format="WEBP", quality=85, method=4)
+    else:
+        if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            image = image.convert("RGBA")
+        image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def data_uri(data):
+    mime = "image/webp" if data[:4] == b"RIFF" and data[8:12] == b"WEBP" else "image/png"
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+@st.cache_resource(show_spinner=False)
+def static_url(digest, width, _data):
+    # Variante einmal nach static/ schreiben (Streamlit liefert den Ordner unter app/static/ aus,
+    # server.enableStaticServing in .streamlit/config.toml). Der Inhalts-Hash im Dateinamen
+    # sorgt dafür, dass der Browser die Datei behalten kann und ein neues Logo eine neue URL bekommt
+    extension = "webp" if _data[:4] == b"RIFF" and _data[8:12] == b"WEBP" else "png"
+    filename = f"logo_{digest[:16]}_{width}.{extension}"
+    path = os.path.join(STATIC_DIR, filename)
+    try:
+        if not os.path.exists(path):
+            os.makedirs(STATIC_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_data)
+            os.replace(tmp_path, path)
+    except OSError:
+        # Nicht beschreibbares Verzeichnis -> Bild direkt ins HTML einbetten
+        return data_uri(_data)
+    return f"{STATIC_URL}/{filename}"
+
+
+@st.cache_resource(show_spinner=False)
+def image_tag(digest, width, scales, _data):
+    # <img> mit srcset auf die statischen Dateien der Varianten; st.image würde die Bytes bei jedem Rerun
+    # neu verkleinern und als PNG kodieren. src ist die 1x-Variante, srcset enthält die größeren
+    urls = [
+        (scale, static_url(digest, width * scale, image_variant(digest, width * scale, _data)))
+        for scale in scales
+    ]
+    srcset = ", ".join(f"{url} {scale}x" for scale, url in urls[1:])
+    return (
+        f'<img src="{urls[0][1]}" srcset="{srcset}" width="{width}" '
+        f'style="max-width: 100%; height: auto;" alt="Logo">'
+    )
+
+
+def logo_html(width=LOGO_WIDTH):
+    # Fertiges HTML für st.markdown(..., unsafe_allow_html=True)
+    stat = os.stat(LOGO_PATH)
+    digest, data = source_file(LOGO_PATH, stat.st_mtime_ns, stat.st_size)
+    return image_tag(digest, width, LOGO_SCALES, data)
+
+
+@st.cache_resource(show_spinner=False)
+def prepare_logo():
+    # Einmal pro Prozess alle Varianten und das HTML erzeugen, damit der erste Seitenaufruf nicht warten muss
+    logo_html(LOGO_WIDTH)
+    return True
@@ -0,0 +1,338 @@
+from standings import RANKING, parse_score
+
+# Rundenname nach Anzahl der Spiele in der Runde
+ROUND_NAMES = {1: "Finale", 2: "Halbfinale", 4: "Viertelfinale", 8: "Achtelfinale", 16: "Sechzehntelfinale"}
+THIRD_PLACE = "Spiel um Platz 3"
+
+
+def round_name(num_matches):
+    return ROUND_NAMES.get(num_matches, f"Runde der letzten {2 * num_matches}")
+
+
+def seed_order(size):
+    # Setzplätze in Bracket-Reihenfolge, z.B. 8 -> [1, 8, 4, 5, 2, 7, 3, 6]:
+    # 1 und 2 treffen frühestens im Finale aufeinander, 1-4 frühestens im Halbfinale
+    order = [1]
+    while len(order) < size:
+        order = [seed for s in order for seed in (s, 2 * len(order) + 1 - s)]
+    return order
+
+
+def cross_group_seeds(group_frames, count):
+    # Setzliste aus den Gruppentabellen über Kreuz: A1, B1, C1, ..., A2, B2, ...
+    # Reicht eine Platzierungsstufe nicht mehr ganz, kommen deren beste Teams weiter (Punkte, Tordifferenz, Tore)
+    seeds = []
+    depth = max((len(df) for df in group_frames), default=0)
+    for place in range(depth):
+        tier = [df.iloc[place] for df in group_frames if place < len(df)]
+        if len(seeds) + len(tier) > count:
+            tier = sorted(tier, key=lambda row: tuple(-row[k] for k in RANKING))
+        seeds.extend(row["name"] for row in tier)
+        if len(seeds) >= count:
+            break
+    return seeds[:count]
+
+
+def new_match(match_id, name, round_index, slot):
+    return {
+        "id": match_id,
+        "round": name,
+        "round_index": round_index,
+        "slot": slot,
+        "team1": None,
+        "team2": None,
+        "score": "-",
+        "winner_to": None,
+        "loser_to": None
+    }
+
+
+def bracket_size(num_teams, minimum=2):
+    size = minimum
+    while size < num_teams:
+        size *= 2
+    return size
+
+
+def link(target_id, slot):
+    return [target_id, "team1" if slot % 2 == 0 else "team2"]
+
+
+def seed_first_round(bracket, match_ids):
+    # Setzliste in die erste Runde eintragen; leere Plätze sind Freilose
+    order = seed_order(2 * len(match_ids))
+    seeds = bracket["seeds"]
+    for slot, match_id in enumerate(match_ids):
+        match = bracket["matches"][match_id]
+        for side, seed in (("team1", order[2 * slot]), ("team2", order[2 * slot + 1])):
+            if seed <= len(seeds):
+                match[side] = seeds[seed - 1]
+            else:
+                mark_empty(bracket, [match_id, side])
+
+
+def build_bracket(seeds, third_place=True):
+    # KO-Baum für beliebig viele Teams (Setzliste, bestes Team zuerst); fehlende Plätze bis zur
+    # nächsten Zweierpotenz sind Freilose für die besten Teams.
+    # Spiele liegen in "matches" nach id, "rounds" enthält je Runde die ids nach Slot;
+    # winner_to/loser_to = [id, "team1"|"team2"] zeigt direkt auf das Folgespiel
+    seeds = list(seeds)
+    size = bracket_size(len(seeds))
+
+    matches = {}
+    rounds = []
+    titles = []
+    num_rounds = size.bit_length() - 1
+    for r in range(num_rounds):
+        count = size >> (r + 1)
+        name = round_name(count)
+        ids = []
+        for slot in range(count):
+            match_id = f"R{r + 1}M{slot + 1}"
+            match = new_match(match_id, f"{name} {slot + 1}" if count > 1 else name, r, slot)
+            if r < num_rounds - 1:
+                match["winner_to"] = link(f"R{r + 2}M{slot // 2 + 1}", slot)
+            matches[match_id] = match
+            ids.append(match_id)
+        rounds.append(ids)
+        titles.append(name)
+
+    if third_place and num_rounds >= 2:
+        matches["P3"] = new_match("P3", THIRD_PLACE, num_rounds - 1, 1)
+        for slot, match_id in enumerate(rounds[-2]):
+            matches[match_id]["loser_to"] = link("P3", slot)
+        # Spiel um Platz 3 vor dem Finale
+        rounds[-1].insert(0, "P3")
+        titles[-1] = "Finalrunde"
+
+    bracket = {"type": "single", "size": size, "seeds": seeds, "rounds": rounds, "titles": titles, "matches": matches}
+    seed_first_round(bracket, rounds[0])
+    count_matches(bracket)
+    return bracket
+
+
+def build_double_bracket(seeds, grand_final_reset=True):
+    # Doppel-KO: wer in der Gewinnerrunde verliert, fällt in die Verliererrunde; erst die zweite
+    # Niederlage scheidet aus. Im großen Finale trifft der Sieger der Gewinnerrunde auf den der
+    # Verliererrunde; gewinnt Letzterer, gibt es ein Entscheidungsspiel (grand_final_reset).
+    seeds = list(seeds)
+    size = bracket_size(len(seeds), minimum=4)
+    k = size.bit_length() - 1
+    matches = {}
+
+    # Gewinnerrunde: W{runde}M{spiel}
+    winner_rounds = []
+    for j in range(1, k + 1):
+        count = size >> j
+        name = "Finale der Gewinnerrunde" if j == k else f"Gewinnerrunde {j}"
+        ids = []
+        for slot in range(count):
+            match_id = f"W{j}M{slot + 1}"
+            matches[match_id] = new_match(match_id, f"{name} – Spiel {slot + 1}" if count > 1 else name, j - 1, slot)
+            if j < k:
+                matches[match_id]["winner_to"] = link(f"W{j + 1}M{slot // 2 + 1}", slot)
+            ids.append(match_id)
+        winner_rounds.append((name, ids))
+
+    # Verliererrunde: L{runde}M{spiel}; ungerade Runden spielen die Überlebenden unter sich aus,
+    # in geraden Runden kommen die Verlierer der nächsten Gewinnerrunde dazu
+    loser_rounds = []
+    num_lb_rounds = 2 * (k - 1)
+    for r in range(1, num_lb_rounds + 1):
+        count = size >> ((r + 1) // 2 + 1)
+        name = "Finale der Verliererrunde" if r == num_lb_rounds else f"Verliererrunde {r}"
+        ids = []
+        for slot in range(count):
+            match_id = f"L{r}M{slot + 1}"
+            matches[match_id] = new_match(match_id, f"{name} – Spiel {slot + 1}" if count > 1 else name, r - 1, slot)
+            if r == num_lb_rounds:
+                matches[match_id]["winner_to"] = ["GF1", "team2"]
+            elif r % 2:
+                matches[match_id]["winner_to"] = [f"L{r + 1}M{slot + 1}", "team1"]
+            else:
+                matches[match_id]["winner_to"] = link(f"L{r + 1}M{slot // 2 + 1}", slot)
+            ids.append(match_id)
+        loser_rounds.append((name, ids))
+
+    # Verlierer der Gewinnerrunde: Runde 1 -> Verliererrunde 1, Runde t+1 -> Verliererrunde 2t
+    # (abwechselnd in umgekehrter Reihenfolge, damit sich Paarungen nicht gleich wiederholen)
+    for slot in range(size >> 1):
+        matches[f"W1M{slot + 1}"]["loser_to"] = link(f"L1M{slot // 2 + 1}", slot)
+    for t in range(1, k):
+        count = size >> (t + 1)
+        for slot in range(count):
+            target = count - 1 - slot if t % 2 else slot
+            matches[f"W{t + 1}M{slot + 1}"]["loser_to"] = [f"L{2 * t}M{target + 1}", "team2"]
+    matches[f"W{k}M1"]["winner_to"] = ["GF1", "team1"]
+
+    matches["GF1"] = new_match("GF1", "Großes Finale", k, 0)
+    matches["GF2"] = new_match("GF2", "Großes Finale – Entscheidungsspiel", k, 1)
+    # Entscheidungsspiel erst, wenn der Sieger der Verliererrunde das erste Finale gewinnt
+    matches["GF2"]["bye"] = True
+
+    # Anzeige in Spielreihenfolge: W1, W2, L1, L2, W3, L3, L4, ..., großes Finale
+    order = [winner_rounds[0]]
+    for j in range(1, k):
+        order += [winner_rounds[j]] + loser_rounds[2 * j - 2:2 * j]
+    order.append(("Großes Finale", ["GF1", "GF2"]))
+    titles = [name for name, _ in order]
+    rounds = [ids for _, ids in order]
+
+    bracket = {
+        "type": "double", "size": size, "seeds": seeds, "rounds": rounds, "titles": titles,
+        "matches": matches, "grand_final_reset": grand_final_reset
+    }
+    seed_first_round(bracket, rounds[0])
+    count_matches(bracket)
+    return bracket
+
+
+def count_matches(bracket):
+    # Fortschritt: gespielte und insgesamt zu spielende Spiele (ohne Freilose), wird bei jedem Ergebnis nachgeführt
+    bracket["played"] = sum(1 for m in bracket["matches"].values() if is_played(m))
+    bracket["total"] = sum(1 for m in bracket["matches"].values() if not m.get("bye"))
+
+
+def is_played(match):
+    return not match.get("bye") and parse_score(match.get("score")) is not None
+
+
+def update_score(bracket, match, score):
+    # Ergebnis setzen und den Zähler gespielter Spiele anpassen
+    was_played = is_played(match)
+    match["score"] = score
+    bracket["played"] += is_played(match) - was_played
+
+
+def result(match):
+    # (Sieger, Verlierer) oder None, solange kein entschiedenes Ergebnis vorliegt
+    if match.get("bye"):
+        return (match["team1"] or match["team2"]), None
+    parsed = parse_score(match.get("score"))
+    if not parsed or parsed[0] == parsed[1] or not match["team1"] or not match["team2"]:
+        return None
+    if parsed[0] > parsed[1]:
+        return match["team1"], match["team2"]
+    return match["team2"], match["team1"]
+
+
+def mark_empty(bracket, target):
+    # Platz bleibt dauerhaft leer (Freilos, das sich durch den Baum fortsetzt)
+    if not target:
+        return
+    match = bracket["matches"][target[0]]
+    empty = match.setdefault("empty", [])
+    if target[1] in empty:
+        return
+    empty.append(target[1])
+    advance_bye(bracket, match)
+
+
+def advance_bye(bracket, match):
+    # Spiel mit leerem Platz wird nicht gespielt: das andere Team ist direkt weiter
+    empty = match.get("empty") or []
+    if not empty:
+        return
+    match["bye"] = True
+    if len(empty) == 2:
+        mark_empty(bracket, match.get("winner_to"))
+    else:
+        other = "team2" if empty[0] == "team1" else "team1"
+        place(bracket, match.get("winner_to"), match[other])
+    mark_empty(bracket, match.get("loser_to"))
+
+
+def place(bracket, target, team):
+    # Team in das Folgespiel eintragen; ändert sich dort die Paarung (Korrektur eines Ergebnisses),
+    # wird das Folgespiel samt allem, was daraus weitergegeben wurde, zurückgesetzt
+    if not target:
+        return
+    match = bracket["matches"][target[0]]
+    if match[target[1]] == team:
+        return
+    was_played = match["score"] != "-" and not match.get("bye")
+    match[target[1]] = team
+    if was_played:
+        update_score(bracket, match, "-")
+        forward(bracket, match, None, None)
+    advance_bye(bracket, match)
+
+
+def forward(bracket, match, winner, loser):
+    if match["id"] == "GF1" and bracket.get("type") == "double":
+        # Gewinnt der Sieger der Verliererrunde, hat jedes Team einmal verloren -> Entscheidungsspiel
+        reset = bracket["matches"]["GF2"]
+        needed = bool(bracket.get("grand_final_reset")) and winner is not None and winner == match["team2"]
+        if not needed:
+            update_score(bracket, reset, "-")
+        if reset.get("bye") == needed:
+            bracket["total"] += 1 if needed else -1
+        reset["bye"] = not needed
+        place(bracket, ["GF2", "team1"], match["team1"] if needed else None)
+        place(bracket, ["GF2", "team2"], match["team2"] if needed else None)
+        return
+    place(bracket, match.get("winner_to"), winner)
+    place(bracket, match.get("loser_to"), loser)
+
+
+def set_score(bracket, match_id, score):
+    # Ergebnis speichern und Sieger (bzw. Verlierer) direkt ins Folgespiel übernehmen, O(1) pro Spiel.
+    # Liefert False bei Unentschieden (Golden Goal fehlt), dann wird nichts weitergegeben
+    match = bracket["matches"][match_id]
+    update_score(bracket, match, score)
+    outcome = result(match)
+    winner, loser = outcome if outcome else (None, None)
+    forward(bracket, match, winner, loser)
+    return outcome is not None
+
+
+def legacy_bracket(matches):
+    # KO-Runde im alten Listenformat (Viertelfinale 1-4, Halbfinale 1-2, Spiel um Platz 3, Finale)
+    # in einen KO-Baum umwandeln, damit eine laufende KO-Phase weitergespielt werden kann.
+    # Alte Paarungen: Halbfinale 1 = Sieger VF1 gegen VF4, Halbfinale 2 = Sieger VF2 gegen VF3
+    by_round = {m.get("round"): m for m in matches}
+    quarters = [by_round.get(f"Viertelfinale {i}") for i in (1, 4, 2, 3)]
+    semis = [by_round.get("Halbfinale 1"), by_round.get("Halbfinale 2")]
+    first_round = quarters if all(quarters) else semis
+    if not all(first_round):
+        return None
+
+    seeds = [team for m in first_round for team in (m["team1"], m["team2"])]
+    bracket = build_bracket(seeds, third_place=True)
+    for match_id, old in zip(bracket["rounds"][0], first_round):
+        bracket["matches"][match_id]["team1"] = old["team1"]
+        bracket["matches"][match_id]["team2"] = old["team2"]
+
+    # Ergebnisse Runde für Runde nachspielen, Sieger und Verlierer werden dabei weitergegeben;
+    # die bisherigen Spielnamen bleiben erhalten
+    old_matches = [first_round]
+    if first_round is quarters:
+        old_matches.append(semis)
+    old_matches.append([by_round.get(THIRD_PLACE), by_round.get("Finale")])
+    for match_ids, olds in zip(bracket["rounds"], old_matches):
+        for match_id, old in zip(match_ids, olds):
+            if old:
+                bracket["matches"][match_id]["round"] = old["round"]
+            if old and old.get("score", "-") != "-":
+                set_score(bracket, match_id, old["score"])
+    return bracket
+
+
+def ko_matches(ko_round):
+    # Alle Spiele der KO-Runde ohne Freilose; ältere Turniere speichern eine einfache Liste
+    if isinstance(ko_round, dict):
+        return [m for m in ko_round["matches"].values() if not m.get("bye")]
+    return list(ko_round or [])
+
+
+def final_match(ko_round):
+    # Letztes ausgetragenes Spiel (Finale bzw. großes Finale oder dessen Entscheidungsspiel)
+    if isinstance(ko_round, dict):
+        final_round = [ko_round["matches"][i] for i in ko_round["rounds"][-1]]
+        return next((m for m in reversed(final_round) if not m.get("bye")), None)
+    return next((m for m in ko_round or [] if m.get("round") == "Finale"), None)
+
+
+def is_finished(ko_round):
+    final = final_match(ko_round)
+    return final is not None and final.get("score", "-") != "-"
@@ -0,0 +1,165 @@
+import random
+from bracket import ko_matches
+from standings import parse_score
+
+# Spieler ohne Vorgeschichte bekommen den Durchschnitt; so viele virtuelle Spiele zählt dieser mit
+PRIOR_GAMES = 3
+# Strafpunkte, wenn zwei frühere Teampartner in derselben Gruppe landen
+PARTNER_PENALTY = 10.0
+# Tauschversuche der lokalen Suche pro Team
+SWAPS_PER_TEAM = 200
+
+
+def tournament_matches(tournament):
+    # Alle Spiele eines Turniers (Gruppenphase, Schweizer System und KO-Runde)
+    for matches in (tournament.get("group_matches") or {}).values():
+        yield from matches
+    for matches in tournament.get("swiss_rounds") or []:
+        yield from (m for m in matches if not m.get("bye"))
+    yield from ko_matches(tournament.get("ko_round"))
+
+
+def tournament_history(tournament):
+    # Zusammenfassung eines Turniers für die Auslosung: Punkte und Spiele je Spieler sowie die Teampartner.
+    # Wird beim Abschluss gespeichert, damit die Auslosung keine ganzen Turniere laden muss.
+    # Listen statt Dicts, da Spielernamen keine Feldnamen in MongoDB sein können
+    players = {}
+    partners = []
+    for team in tournament.get("teams") or []:
+        players[team["name"]] = list(team.get("players") or [])
+        if len(set(players[team["name"]])) == 2:
+            partners.append(sorted(players[team["name"]]))
+
+    records = {}
+    for match in tournament_matches(tournament):
+        parsed = parse_score(match.get("score"))
+        if not parsed:
+            continue
+        g1, g2 = parsed
+        for team, points in ((match["team1"], 3 if g1 > g2 else int(g1 == g2)),
+                             (match["team2"], 3 if g2 > g1 else int(g1 == g2))):
+            for player in players.get(team, []):
+                record = records.setdefault(player, [0, 0])
+                record[0] += points
+                record[1] += 1
+    return {
+        "players": [[player, points, games] for player, (points, games) in records.items()],
+        "partners": partners
+    }
+
+
+def player_history(history):
+    # Aus den Zusammenfassungen früherer Turniere: Punkte und Spiele je Spieler sowie frühere Partner
+    records = {}
+    partners = set()
+    for summary in history:
+        for player, points, games in summary.get("players") or []:
+            record = records.setdefault(player, [0, 0])
+            record[0] += points
+            record[1] += games
+        for pair in summary.get("partners") or []:
+            partners.add(frozenset(pair))
+    return records, partners
+
+
+def team_strengths(teams, records):
+    # Stärke = Durchschnitt der Punkte pro Spiel der beiden Spieler, zum Gesamtschnitt hin geglättet
+    total_points = sum(r[0] for r in records.values())
+    total_games = sum(r[1] for r in records.values())
+    average = total_points / total_games if total_games else 1.0
+
+    def rating(player):
+        points, games = records.get(player, (0, 0))
+        return (points + PRIOR_GAMES * average) / (games + PRIOR_GAMES)
+
+    return [
+        sum(rating(p) for p in team.get("players") or []) / max(1, len(team.get("players") or []))
+        for team in teams
+    ]
+
+
+def draw_groups(teams, group_names, history=(), seed=None):
+    # Auslosung mit Lostöpfen (die stärksten len(group_names) Teams in Topf 1 usw.), danach lokale Suche:
+    # Teams aus demselben Topf werden zwischen Gruppen getauscht, solange das die Streuung der
+    # Gruppenstärken und die Zahl früherer Teampartner in einer Gruppe verringert.
+    # Liefert {gruppe: [teams]} im Format von "groups"
+    rng = random.Random(seed)
+    group_names = list(group_names)
+    num_groups = len(group_names)
+    if not teams or not num_groups:
+        return {g: [] for g in group_names}
+
+    records, partners = player_history(history)
+    strength = team_strengths(teams, records)
+
+    # Konflikte: Teams, deren Spieler früher zusammen in einem Team waren
+    by_player = {}
+    for i, team in enumerate(teams):
+        for player in team.get("players") or []:
+            by_player.setdefault(player, set()).add(i)
+    conflicts = [set() for _ in teams]
+    for pair in partners:
+        first, second = tuple(pair)
+        for i in by_player.get(first, ()):
+            for j in by_player.get(second, ()):
+                if i != j:
+                    conflicts[i].add(j)
+                    conflicts[j].add(i)
+
+    # Lostöpfe ziehen
+    order = sorted(range(len(teams)), key=lambda i: (-strength[i], rng.random()))
+    pots = [order[k:k + num_groups] for k in range(0, len(order), num_groups)]
+    group_of = {}
+    for pot in pots:
+        targets = rng.sample(range(num_groups), len(pot))
+        for i, g in zip(pot, targets):
+            group_of[i] = g
+
+    sums = [0.0] * num_groups
+    members = [set() for _ in range(num_groups)]
+    for i, g in group_of.items():
+        sums[g] += strength[i]
+        members[g].add(i)
+
+    def clashes(i, g, without):
+        return sum(1 for j in conflicts[i] if j in members[g] and j != without)
+
+    # Lokale Suche: zufällige Tausche innerhalb eines Topfes, nur Verbesserungen werden übernommen.
+    # Kosten = Summe der quadrierten Abweichungen der Gruppenstärke + Strafpunkte für Konflikte
+    swappable = [pot for pot in pots if len(pot) > 1]
+    for _ in range(SWAPS_PER_TEAM * len(teams) if swappable else 0):
+        pot = rng.choice(swappable)
+        a, b = rng.sample(pot, 2)
+        ga, gb = group_of[a], group_of[b]
+        diff = strength[b] - strength[a]
+        # Änderung von (sa^2 + sb^2), wenn a und b die Gruppe tauschen (Mittelwert bleibt gleich)
+        delta = (sums[ga] + diff) ** 2 + (sums[gb] - diff) ** 2 - sums[ga] ** 2 - sums[gb] ** 2
+        if conflicts[a] or conflicts[b]:
+            delta += PARTNER_PENALTY * (
+                clashes(a, gb, b) + clashes(b, ga, a) - clashes(a, ga, a) - clashes(b, gb, b)
+            )
+        if delta < -1e-12:
+            sums[ga] += diff
+            sums[gb] -= diff
+            members[ga].remove(a)
+            members[gb].remove(b)
+            members[ga].add(b)
+            members[gb].add(a)
+            group_of[a], group_of[b] = gb, ga
+
+    # Innerhalb der Gruppe nach Stärke sortieren (Setzliste)
+    return {
+        group_names[g]: [teams[i] for i in sorted(members[g], key=lambda i: -strength[i])]
+        for g in range(num_groups)
+    }
+
+
+def group_spread(groups, teams, history=()):
+    # Kleinste und größte durchschnittliche Gruppenstärke (zur Anzeige)
+    records, _ = player_history(history)
+    strength = dict(zip((t["name"] for t in teams), team_strengths(teams, records)))
+    averages = [
+        sum(strength.get(t["name"], 0) for t in members) / len(members)
+        for members in groups.values() if members
+    ]
+    return (min(averages), max(averages)) if averages else (0.0, 0.0)
@@ -1,29 +1,563 @@
-from urllib.parse import quote_plus
-from pymongo import MongoClient
+import atexit
+import base64
+import copy
+import json
+import os
+import threading
+import time
+import zlib
 import streamlit as st
+from bracket import is_finished, legacy_bracket
+from draw import tournament_history
+from storage import open_store, apply_paths, WriteBehindCollection
 
-mongo_secrets = st.secrets["mongodb"]
 
-# Username und Passwort URL-kodieren
-MONGO_USERNAME = quote_plus(mongo_secrets["MONGO_USERNAME"])
-MONGO_PASSWORD = quote_plus(mongo_secrets["MONGO_PASSWORD"])
-MONGO_CLUSTER = mongo_secrets["MONGO_CLUSTER"]
+def storage_config():
+    # [storage] in secrets.toml, z.B. engine = "sqlite" und path = "wuzzelapp.db";
+    # WUZZEL_STORAGE überschreibt die Engine (z.B. für Benchmarks ohne Netzwerk)
+    try:
+        config = dict(st.secrets.get("storage", {}))
+    except Exception:
+        # Keine secrets.toml vorhanden
+        config = {}
+    if os.environ.get("WUZZEL_STORAGE"):
+        config["engine"] = os.environ["WUZZEL_STORAGE"]
+    if os.environ.get("WUZZEL_STORAGE_PATH"):
+        config["path"] = os.environ["WUZZEL_STORAGE_PATH"]
+    if os.environ.get("WUZZEL_WRITE_BEHIND"):
+        config["write_behind"] = os.environ["WUZZEL_WRITE_BEHIND"] not in ("0", "false", "")
+    return config
+
+
+@st.cache_resource
+def get_store():
+    # Eine Verbindung (MongoClient bzw. SQLite-Datei) pro Prozess für alle Collections;
+    # wird erst beim ersten Zugriff aufgebaut, nicht beim Import
+    config = storage_config()
+    mongo_secrets = st.secrets["mongodb"] if config.get("engine", "mongo") == "mongo" else None
+    return open_store(config, mongo_secrets)
+
+
+@st.cache_resource
+def get_collection():
+    config = storage_config()
+    collection = get_store().collection(config.get("collection", "Wuzzelapp_2"))
+    if config.get("write_behind", False):
+        collection = WriteBehindCollection(
+            collection,
+            window=float(config.get("write_behind_window", 0.5)),
+            max_pending=int(config.get("write_behind_max_pending", 100))
+        )
+        # Beim Beenden alle ausstehenden Saves noch schreiben
+        atexit.register(collection.close)
+    return collection
+
+
+@st.cache_resource
+def get_event_log():
+    # Nur mit persistence = "events": jede Änderung wird als kleines Event angehängt,
+    # das Turnier-Dokument ist dann nur noch ein periodischer Snapshot
+    config = storage_config()
+    if config.get("persistence") != "events":
+        return None
+    return get_store().collection(config.get("event_collection", "Wuzzelapp_events"))
+
+
+@st.cache_resource
+def get_archive():
+    # Abgeschlossene Turniere, komprimiert; werden nur beim expliziten Öffnen gelesen
+    config = storage_config()
+    return get_store().collection(config.get("archive_collection", "Wuzzelapp_archive"))
+
+
+def snapshot_interval():
+    return int(storage_config().get("snapshot_interval", 50))
+
+
+def write_behind_stats():
+    # Anzahl ausstehender Saves und Dauer des letzten Schreibvorgangs (nur im Write-Behind-Modus)
+    collection = get_collection()
+    if isinstance(collection, WriteBehindCollection):
+        return collection.stats()
+    return None
+
+
+# Speicher-Layout:
+#   {"_id": "index"}              -> aktuelle Auswahl + Name/Datum aller Turniere
+#   {"_id": "tournament:<name>"}  -> ein Dokument pro Turnier
+#   {"_id": "app_state"}          -> altes Layout (alles in einem Dokument), nur noch für die Migration
+INDEX_ID = "index"
+LEGACY_ID = "app_state"
+
+# Wie oft ein Speichern nach einem Konflikt automatisch zusammengeführt und wiederholt wird
+MAX_SAVE_RETRIES = 5
+
+# Fortschrittszähler: bei parallelen Saves werden die Änderungen beider Seiten addiert
+COUNTER_PATHS = ["data.progress.played", "data.progress.total", "data.ko_round.played", "data.ko_round.total"]
+
+
+class SaveConflict(Exception):
+    # Eine andere Session hat dieselben Felder geändert
+    def __init__(self, name, paths):
+        super().__init__(f"Turnier '{name}' wurde parallel geändert: {', '.join(sorted(paths))}")
+        self.name = name
+        self.paths = paths
+
+
+def tournament_id(name):
+    return f"tournament:{name}"
+
+
+def index_key(name):
+    # Feldnamen in MongoDB dürfen keine Punkte enthalten und nicht mit $ beginnen
+    key = name.replace(".", "．")
+    if key.startswith("$"):
+        key = "＄" + key[1:]
+    return key
+
+
+def tournament_status(tournament):
+    if is_finished(tournament.get("ko_round")):
+        return "beendet"
+    if tournament.get("schedule_created"):
+        return "läuft"
+    return "geplant"
+
+
+def tournament_meta(name, tournament, status=None):
+    # Kleiner Eintrag im Index-Dokument, reicht für die Turnierliste
+    return {
+        "name": name,
+        "date": tournament.get("date"),
+        "status": status or tournament_status(tournament),
+        "num_teams": len(tournament.get("teams") or [])
+    }
+
+
+def migrate_app_state():
+    # Einmalige Migration: altes app_state-Dokument in Index + Turnier-Dokumente aufteilen
+    collection = get_collection()
+    legacy = collection.get(LEGACY_ID)
+    legacy_data = legacy["data"] if legacy else {"tournaments": {}, "current_tournament": None}
+
+    entries = {}
+    for name, tournament in legacy_data.get("tournaments", {}).items():
+        collection.update(tournament_id(name), sets={"name": name, "data": tournament}, upsert=True)
+        entries[index_key(name)] = tournament_meta(name, tournament)
+
+    index = {"current_tournament": legacy_data.get("current_tournament"), "tournaments": entries}
+    # Falls eine zweite Session parallel migriert hat, gewinnt der erste Index
+    collection.insert_if_missing(INDEX_ID, index)
+    return collection.get(INDEX_ID)
+
+
+def load_index():
+    index = get_collection().get(INDEX_ID)
+    if index is None:
+        index = migrate_app_state()
+    return {
+        "current_tournament": index.get("current_tournament"),
+        "tournaments": {entry["name"]: entry for entry in index.get("tournaments", {}).values()}
+    }
+
+
+def is_safe_key(key):
+    return isinstance(key, str) and key != "" and "." not in key and not key.startswith("$")
+
+
+def diff_paths(old, new, prefix):
+    # Liefert die geänderten Pfade (z.B. "data.group_matches.A.3.score") als $set- und $unset-Felder
+    sets, unsets = {}, []
+    if isinstance(old, dict) and isinstance(new, dict):
+        if not all(is_safe_key(k) for k in list(old) + list(new)):
+            # Keys, die kein Pfad sein können -> ganzes Dict schreiben
+            if old != new:
+                sets[prefix] = new
+            return sets, unsets
+        for key, value in new.items():
+            if key in old:
+                sub_sets, sub_unsets = diff_paths(old[key], value, f"{prefix}.{key}")
+                sets.update(sub_sets)
+                unsets.extend(sub_unsets)
+            else:
+                sets[f"{prefix}.{key}"] = value
+        unsets.extend(f"{prefix}.{key}" for key in old if key not in new)
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            sub_sets, sub_unsets = diff_paths(old_item, new_item, f"{prefix}.{i}")
+            sets.update(sub_sets)
+            unsets.extend(sub_unsets)
+    elif old != new or type(old) is not type(new):
+        # Listen mit geänderter Länge und Werte werden als Ganzes gesetzt
+        sets[prefix] = new
+    return sets, unsets
+
+
+def paths_overlap(path, other):
+    return path == other or path.startswith(other + ".") or other.startswith(path + ".")
+
+
+def conflicting_paths(local_sets, local_unsets, remote_sets, remote_unsets):
+    # Überschneidende Pfade sind nur ein Konflikt, wenn beide Seiten etwas anderes geschrieben haben
+    conflicts = set()
+    for path in list(local_sets) + local_unsets:
+        for other in list(remote_sets) + remote_unsets:
+            if not paths_overlap(path, other):
+                continue
+            same_set = path == other and path in local_sets and other in remote_sets and local_sets[path] == remote_sets[other]
+            same_unset = path == other and path in local_unsets and other in remote_unsets
+            if not (same_set or same_unset):
+                conflicts.add(path)
+    return conflicts
+
+
+def get_path(root, path):
+    value = root
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def merge_counters(base, tournament, sets, remote_sets):
+    # Zähler, die beide Seiten geändert haben: fremder Stand + eigene Änderung, statt Konflikt
+    for path in COUNTER_PATHS:
+        if path in sets and path in remote_sets:
+            old = get_path({"data": base}, path)
+            if not isinstance(old, int) or not isinstance(sets[path], int) or not isinstance(remote_sets[path], int):
+                continue
+            merged = remote_sets.pop(path) + sets.pop(path) - old
+            apply_paths({"data": tournament}, {path: merged}, [])
+
+
+def counter_deltas(base, sets):
+    # Geänderte Zähler aus sets herausnehmen und als Differenz zum Ausgangsstand liefern ($inc)
+    incs = {}
+    for path in COUNTER_PATHS:
+        old = get_path({"data": base}, path)
+        if path in sets and isinstance(old, int) and isinstance(sets[path], int):
+            incs[path] = sets.pop(path) - old
+    return incs
+
+
+def saved_snapshots():
+    # Zuletzt geladener/gespeicherter Stand pro Turnier dieser Session (Basis für Delta-Saves)
+    # Format: {name: {"rev": <Revision in der DB>, "data": <Kopie des Turniers>}}
+    if "_saved_tournaments" not in st.session_state:
+        st.session_state["_saved_tournaments"] = {}
+    return st.session_state["_saved_tournaments"]
+
+
+@st.cache_resource
+def shared_tournament_cache():
+    # Prozessweiter Cache, den alle Sessions teilen: {name: (rev, data)}
+    return {"lock": threading.Lock(), "tournaments": {}}
+
+
+def cache_tournament(name, rev, tournament, replace=False):
+    cache = shared_tournament_cache()
+    with cache["lock"]:
+        cached = cache["tournaments"].get(name)
+        # Nie einen neueren Stand durch einen älteren ersetzen (außer bei neu angelegten Turnieren)
+        if replace or cached is None or cached[0] < rev:
+            cache["tournaments"][name] = (rev, copy.deepcopy(tournament))
+
+
+def apply_events(tournament, events):
+    for event in events:
+        apply_paths({"data": tournament}, dict(event["sets"]), event["unsets"])
+
+
+def fetch_tournament_from_events(name, event_log):
+    # Stand = letzter Snapshot (bzw. gecachter Stand) + alle Events danach; rev = seq des letzten Events
+    cache = shared_tournament_cache()
+    with cache["lock"]:
+        cached = cache["tournaments"].get(name)
+    if cached:
+        rev, tournament = cached[0], copy.deepcopy(cached[1])
+    else:
+        doc = get_collection().get(tournament_id(name), ["data", "rev"])
+        if doc is None:
+            return None, None
+        rev, tournament = doc.get("rev", 0), doc["data"]
+
+    events = event_log.read_since(name, rev)
+    if events:
+        apply_events(tournament, events)
+        rev = events[-1]["seq"]
+    cache_tournament(name, rev, tournament)
+    return rev, tournament
+
+
+def write_snapshot(name, rev, tournament):
+    # Snapshot nur vorwärts schreiben, damit ein langsamer Save keinen neueren überschreibt
+    collection = get_collection()
+    doc = collection.get(tournament_id(name), ["rev"])
+    current_rev = doc.get("rev", 0) if doc else None
+    if current_rev is None or current_rev < rev:
+        collection.update(tournament_id(name), sets={"name": name, "data": tournament, "rev": rev},
+                          expected_rev=current_rev, upsert=current_rev is None)
+
+
+def fetch_tournament(name):
+    event_log = get_event_log()
+    if event_log is not None:
+        return fetch_tournament_from_events(name, event_log)
+
+    # Erst nur die Revision abfragen; das volle Dokument wird nur gelesen, wenn sich etwas geändert hat
+    collection = get_collection()
+    doc = collection.get(tournament_id(name), ["rev"])
+    if doc is None:
+        return None, None
+    rev = doc.get("rev", 0)
+
+    cache = shared_tournament_cache()
+    with cache["lock"]:
+        cached = cache["tournaments"].get(name)
+    if cached and cached[0] == rev:
+        return rev, copy.deepcopy(cached[1])
+
+    doc = collection.get(tournament_id(name), ["data", "rev"])
+    if doc is None:
+        return None, None
+    rev = doc.get("rev", 0)
+    # Stände mit noch nicht geschriebenen Änderungen (Write-Behind) nicht in den gemeinsamen Cache
+    if not (isinstance(collection, WriteBehindCollection) and collection.has_pending(tournament_id(name))):
+        cache_tournament(name, rev, doc["data"])
+    return rev, doc["data"]
+
+
+def upgrade_tournament(tournament):
+    # Ältere Turniere: KO-Runde als Liste -> KO-Baum; wird mit dem nächsten Speichern geschrieben
+    ko_round = tournament.get("ko_round")
+    if isinstance(ko_round, list) and ko_round:
+        bracket = legacy_bracket(ko_round)
+        if bracket is not None:
+            tournament["ko_round"] = bracket
+    return tournament
+
+
+def load_tournament(name):
+    rev, tournament = fetch_tournament(name)
+    if tournament is not None:
+        saved_snapshots()[name] = {"rev": rev, "data": copy.deepcopy(tournament)}
+        upgrade_tournament(tournament)
+    return tournament
 
-# Verbindungs-URI zusammensetzen
-MONGO_URI = f"mongodb+srv://{MONGO_USERNAME}:{MONGO_PASSWORD}@{MONGO_CLUSTER}/?retryWrites=true&w=majority&appName=Cluster0"
-client = MongoClient(MONGO_URI)
-db = client["Wuzzelapp"]
-collection = db["Wuzzelapp_2"]
 
 def load_data():
-    data = collection.find_one({"_id": "app_state"})
-    if data:
-        return data["data"]
-    return {"tournaments": {}, "current_tournament": None}
-
-def save_data(data):
-    collection.update_one(
-        {"_id": "app_state"},
-        {"$set": {"data": data}},
-        upsert=True
+    # Nur das Index-Dokument und das aktive Turnier laden
+    index = load_index()
+    # index_current: Auswahl, wie sie im Index-Dokument steht (save_index schreibt nur bei Änderungen)
+    data = {
+        "tournaments": {},
+        "current_tournament": index["current_tournament"],
+        "index": index["tournaments"],
+        "index_current": index["current_tournament"]
+    }
+
+    current = index["current_tournament"]
+    if current:
+        tournament = load_tournament(current)
+        if tournament is None:
+            data["current_tournament"] = None
+        else:
+            data["tournaments"][current] = tournament
+    return data
+
+
+def save_index(data):
+    # Index-Dokument nur schreiben, wenn sich die Auswahl oder der Eintrag des Turniers
+    # (Status, Teamanzahl, Datum) geändert hat; ein normales Ergebnis kostet so nur einen Schreibvorgang
+    current = data.get("current_tournament")
+    index = data.setdefault("index", {})
+    update = {}
+    if "index_current" not in data or data["index_current"] != current:
+        update["current_tournament"] = current
+    if current and current in data["tournaments"]:
+        meta = tournament_meta(current, data["tournaments"][current])
+        if index.get(current) != meta:
+            update[f"tournaments.{index_key(current)}"] = meta
+    if not update:
+        return
+    collection = get_collection()
+    collection.update(INDEX_ID, sets=update, upsert=True)
+    if current and current in data["tournaments"] and meta["status"] == "beendet" and index.get(current) != meta:
+        # Zusammenfassung für spätere Auslosungen beim Abschluss einmal ablegen
+        collection.update(tournament_id(current), sets={"history": tournament_history(data["tournaments"][current])})
+    data["index_current"] = current
+    if current and current in data["tournaments"]:
+        index[current] = meta
+
+
+def drop_cached(name):
+    cache = shared_tournament_cache()
+    with cache["lock"]:
+        cache["tournaments"].pop(name, None)
+
+
+def archive_tournament(data, name):
+    # Turnier komprimiert ins Archiv verschieben und aus dem aktiven Speicher entfernen
+    rev, tournament = fetch_tournament(name)
+    if tournament is None:
+        return False
+    blob = base64.b64encode(zlib.compress(json.dumps(tournament).encode("utf-8"), 9)).decode("ascii")
+    get_archive().update(
+        tournament_id(name), sets={"name": name, "blob": blob, "history": tournament_history(tournament)}, upsert=True
     )
+
+    collection = get_collection()
+    meta = tournament_meta(name, tournament, status="archiviert")
+    collection.update(INDEX_ID, sets={f"tournaments.{index_key(name)}": meta}, upsert=True)
+    collection.delete(tournament_id(name))
+
+    drop_cached(name)
+    saved_snapshots().pop(name, None)
+    data["tournaments"].pop(name, None)
+    data["index"][name] = meta
+    return True
+
+
+def read_archived(name):
+    doc = get_archive().get(tournament_id(name))
+    if doc is None:
+        return None
+    return json.loads(zlib.decompress(base64.b64decode(doc["blob"])).decode("utf-8"))
+
+
+def restore_tournament(data, name):
+    # Archiviertes Turnier öffnen: entpacken, wieder als aktives Turnier speichern und auswählen
+    tournament = read_archived(name)
+    if tournament is None:
+        return False
+
+    saved_snapshots().pop(name, None)
+    data["tournaments"] = {name: upgrade_tournament(tournament)}
+    data["current_tournament"] = name
+    save_data(data)
+    get_archive().delete(tournament_id(name))
+    return True
+
+
+def read_tournament(name):
+    # Aktuellen Stand direkt lesen, ohne den gemeinsamen Cache zu füllen
+    doc = get_collection().get(tournament_id(name), ["data", "rev"])
+    if doc is None:
+        return None
+    tournament = doc["data"]
+    event_log = get_event_log()
+    if event_log is not None:
+        apply_events(tournament, event_log.read_since(name, doc.get("rev", 0)))
+    return tournament
+
+
+def load_history(index, exclude=None):
+    # Zusammenfassungen aller bisherigen Turniere, z.B. für die Teamstärke bei der Auslosung.
+    # Beendete und archivierte Turniere liefern die beim Abschluss gespeicherte Zusammenfassung;
+    # nur laufende (und ältere ohne Zusammenfassung) werden ganz gelesen
+    history = []
+    for name, meta in index.items():
+        if name == exclude:
+            continue
+        archived = meta.get("status") == "archiviert"
+        source = get_archive() if archived else get_collection()
+        summary = None
+        if archived or meta.get("status") == "beendet":
+            doc = source.get(tournament_id(name), ["history"])
+            summary = doc.get("history") if doc else None
+        if summary is None:
+            tournament = read_archived(name) if archived else read_tournament(name)
+            if tournament is None:
+                continue
+            summary = tournament_history(tournament)
+            if archived or tournament_status(tournament) == "beendet":
+                # Ältere Turniere: Zusammenfassung einmal nachtragen
+                source.update(tournament_id(name), sets={"history": summary})
+        history.append(summary)
+    return history
+
+
+def save_tournament(name, tournament, event=None):
+    # Compare-and-swap auf das rev-Feld; bei Konflikt werden fremde Änderungen
+    # übernommen, solange sie andere Felder betreffen als die eigenen
+    collection = get_collection()
+    event_log = get_event_log()
+    snapshots = saved_snapshots()
+
+    for _ in range(MAX_SAVE_RETRIES):
+        base = snapshots.get(name)
+        if base is None and event_log is not None:
+            # Neues Turnier -> Snapshot hinter dem letzten Event eines evtl. gleichnamigen alten Turniers
+            rev = event_log.last_seq(name)
+            collection.update(tournament_id(name), sets={"name": name, "data": tournament, "rev": rev}, upsert=True)
+            snapshots[name] = {"rev": rev, "data": copy.deepcopy(tournament)}
+            cache_tournament(name, rev, tournament, replace=True)
+            return
+        if base is None:
+            # Neues Turnier -> komplett schreiben
+            collection.update(tournament_id(name), sets={"name": name, "data": tournament}, bump_rev=True, upsert=True)
+            doc = collection.get(tournament_id(name), ["rev"])
+            snapshots[name] = {"rev": doc["rev"], "data": copy.deepcopy(tournament)}
+            cache_tournament(name, doc["rev"], tournament)
+            return
+
+        # Nur geänderte Felder schreiben
+        sets, unsets = diff_paths(base["data"], tournament, "data")
+        if not sets and not unsets:
+            return
+
+        if event_log is not None:
+            # Event anhängen; die eindeutige seq ersetzt die rev-Prüfung
+            seq = base["rev"] + 1
+            entry = {
+                "type": event or "update",
+                # Punkt-Pfade als Liste speichern, da sie keine Feldnamen sein dürfen
+                "sets": [[path, value] for path, value in sets.items()],
+                "unsets": unsets,
+                "ts": time.time()
+            }
+            if event_log.append(name, seq, entry):
+                snapshots[name] = {"rev": seq, "data": copy.deepcopy(tournament)}
+                cache_tournament(name, seq, tournament)
+                if seq % snapshot_interval() == 0:
+                    write_snapshot(name, seq, tournament)
+                return
+        elif isinstance(collection, WriteBehindCollection):
+            # Im Write-Behind-Modus wird erst später geschrieben, daher ohne rev-Prüfung
+            # (bei gleichen Feldern gewinnt der letzte Save; Zähler werden als Differenz hochgezählt,
+            # damit parallele Saves sich nicht gegenseitig überschreiben)
+            # Der gemeinsame Cache wird über die neue Revision beim nächsten Laden aktualisiert
+            incs = counter_deltas(base["data"], sets)
+            collection.update(tournament_id(name), sets=sets, unsets=unsets, bump_rev=True, incs=incs)
+            snapshots[name] = {"rev": base["rev"] + 1, "data": copy.deepcopy(tournament)}
+            return
+        elif collection.update(tournament_id(name), sets=sets, unsets=unsets, bump_rev=True, expected_rev=base["rev"]):
+            snapshots[name] = {"rev": base["rev"] + 1, "data": copy.deepcopy(tournament)}
+            cache_tournament(name, base["rev"] + 1, tournament)
+            return
+
+        # Konflikt: aktuellen Stand holen und fremde Änderungen einarbeiten
+        remote_rev, remote = fetch_tournament(name)
+        if remote is None:
+            snapshots.pop(name, None)
+            continue
+        remote_sets, remote_unsets = diff_paths(base["data"], remote, "data")
+        merge_counters(base["data"], tournament, sets, remote_sets)
+        conflicts = conflicting_paths(sets, unsets, remote_sets, remote_unsets)
+        if conflicts:
+            raise SaveConflict(name, conflicts)
+
+        apply_paths({"data": tournament}, remote_sets, remote_unsets)
+        snapshots[name] = {"rev": remote_rev, "data": remote}
+
+    raise SaveConflict(name, set())
+
+
+def save_data(data, event=None):
+    # Nur das aktive Turnier schreiben, nicht alle Turniere.
+    # event benennt die Änderung (z.B. "group_scores") für das Event-Log
+    current = data.get("current_tournament")
+    if current and current in data["tournaments"]:
+        save_tournament(current, data["tournaments"][current], event)
+    save_index(data)
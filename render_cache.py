@@ -0,0 +1,34 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    # Begrenzter Cache (least recently used), von allen Sessions gemeinsam genutzt
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.items = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.items:
+                return None
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+
+def results_key(team_names, matches):
+    # Hash über Teams und Ergebnisse einer Gruppe; gleiche Ergebnisse -> gleiche Tabelle
+    digest = hashlib.sha1()
+    digest.update(repr(tuple(team_names)).encode("utf-8"))
+    for match in matches:
+        digest.update(repr((match.get("match_number"), match["team1"], match["team2"], match.get("score", "-"))).encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,86 @@
+def round_robin_rounds(team_names):
+    # Kreismethode: jeder gegen jeden in n-1 Runden (bei ungerader Anzahl n Runden mit je einem Freilos)
+    teams = list(team_names)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            t1, t2 = teams[i], teams[n - 1 - i]
+            if t1 is None or t2 is None:
+                continue
+            # Team 1 (blau, Anstoß) abwechseln, damit nicht immer dasselbe Team beginnt
+            pairs.append((t1, t2) if (r + i) % 2 == 0 else (t2, t1))
+        rounds.append(pairs)
+        # Erstes Team bleibt fest, alle anderen rotieren
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+
+def schedule_slots(groups, num_tables, lookahead=1):
+    # Verteilt die Spiele aller Gruppen auf Zeitfenster mit num_tables Tischen:
+    # - kein Team spielt zweimal im selben Zeitfenster
+    # - möglichst kein Team in zwei aufeinanderfolgenden Zeitfenstern
+    # - Gruppen werden abwechselnd bedient, Runden der Kreismethode bleiben grob in Reihenfolge
+    # groups: {gruppe: [teamnamen]}; liefert eine Liste von Zeitfenstern mit (gruppe, team1, team2)
+    num_tables = max(1, int(num_tables))
+    pending = []
+    for g, team_names in groups.items():
+        for round_index, pairs in enumerate(round_robin_rounds(team_names)):
+            for t1, t2 in pairs:
+                pending.append((round_index, g, t1, t2))
+
+    group_order = list(groups.keys())
+    slots = []
+    previous = set()
+    while pending:
+        # Gruppen reihum zuerst bedienen
+        offset = len(slots) % max(1, len(group_order))
+        rotation = {g: (i - offset) % len(group_order) for i, g in enumerate(group_order)}
+        pending.sort(key=lambda m: (m[0], rotation[m[1]]))
+        earliest = {}
+        for round_index, g, _, _ in pending:
+            earliest.setdefault(g, round_index)
+
+        slot, used, taken = [], set(), set()
+        # 1. innerhalb des Runden-Fensters ohne Pause-Verletzung, 2. mit, 3. beliebige Runde:
+        # Tische bleiben nur leer, wenn wirklich kein Spiel möglich ist
+        for in_window, allow_back_to_back in ((True, False), (True, True), (False, True)):
+            for i, (round_index, g, t1, t2) in enumerate(pending):
+                if len(slot) == num_tables:
+                    break
+                if i in taken or t1 in used or t2 in used:
+                    continue
+                if in_window and round_index > earliest[g] + lookahead:
+                    continue
+                if not allow_back_to_back and (t1 in previous or t2 in previous):
+                    continue
+                slot.append((g, t1, t2))
+                used.update((t1, t2))
+                taken.add(i)
+        pending = [m for i, m in enumerate(pending) if i not in taken]
+        slots.append(slot)
+        previous = used
+    return slots
+
+
+def build_group_matches(groups, num_tables):
+    # Spielplan im Format von "group_matches", jedes Spiel mit Zeitfenster ("slot") und Tisch ("table")
+    group_matches = {g: [] for g in groups.keys()}
+    match_number = 1
+    for slot_index, slot in enumerate(schedule_slots(groups, num_tables), start=1):
+        for table, (g, t1, t2) in enumerate(slot, start=1):
+            group_matches[g].append({
+                "match_number": match_number,
+                "team1": t1,
+                "team2": t2,
+                "score": "-",
+                "color": "Rot vs Blau",
+                "slot": slot_index,
+                "table": table
+            })
+            match_number += 1
+    return group_matches
@@ -0,0 +1,101 @@
+import numpy as np
+from scheduler import schedule_slots
+
+# Anteil der KO-Spiele, die unentschieden enden und ins Golden Goal gehen
+GOLDEN_GOAL_SHARE = 0.2
+
+
+def group_fixtures(num_groups, teams_per_group, num_tables):
+    # Gruppenspiele in der Reihenfolge des Spielplans als (team1, team2) mit fortlaufenden Team-Indizes
+    groups = {g: [g * teams_per_group + i for i in range(teams_per_group)] for g in range(num_groups)}
+    return [(t1, t2) for slot in schedule_slots(groups, num_tables) for _, t1, t2 in slot]
+
+
+def ko_fixtures(ko_teams, third_place=True):
+    # KO-Baum als Liste von Abhängigkeiten: jedes Spiel wartet auf die Spiele in deps
+    # (erste Runde: auf das Ende der Gruppenphase, deps = ())
+    fixtures = [()] * (ko_teams // 2)
+    previous = list(range(len(fixtures)))
+    while len(previous) > 1:
+        if len(previous) == 2 and third_place:
+            fixtures.append(tuple(previous))
+        current = []
+        for i in range(0, len(previous), 2):
+            current.append(len(fixtures))
+            fixtures.append((previous[i], previous[i + 1]))
+        previous = current
+    return fixtures
+
+
+def durations(rng, replications, count, match_time, spread, golden_goal=0.0):
+    # Spiellänge streut normalverteilt um match_time (mind. halbe Spielzeit);
+    # bei Unentschieden kommt eine exponentialverteilte Golden-Goal-Verlängerung dazu
+    times = rng.normal(match_time, spread * match_time, size=(replications, count))
+    times = np.maximum(times, 0.5 * match_time)
+    if golden_goal > 0:
+        draws = rng.random((replications, count)) < GOLDEN_GOAL_SHARE
+        times += draws * rng.exponential(golden_goal, size=(replications, count))
+    return times
+
+
+def berechne_turnierzeit_und_spiele(anzahl_gruppen, anzahl_mannschaften, spielzeit_gruppenphase, spielzeit_kophase, viertelfinale):
+    # Grobe Schätzung des Turnierzeit Rechners: alle Spiele nacheinander, ohne Wechselzeit
+    # Spiele pro Gruppe (Jeder gegen jeden)
+    gesamt_spiele_gruppenphase = anzahl_mannschaften * (anzahl_mannschaften - 1) // 2 * anzahl_gruppen
+
+    # KO-Spiele
+    if viertelfinale:
+        spiele_kophase = 8  # 4 Viertelfinale, 2 Halbfinale, Spiel um Platz 3, Finale
+    else:
+        spiele_kophase = 4  # 2 Halbfinale, Spiel um Platz 3, Finale
+
+    gesamt_spiele = gesamt_spiele_gruppenphase + spiele_kophase
+    gesamtzeit_minuten = gesamt_spiele_gruppenphase * spielzeit_gruppenphase + spiele_kophase * spielzeit_kophase
+
+    return gesamtzeit_minuten, gesamt_spiele
+
+
+def simulate_tournament(num_groups, teams_per_group, num_tables, group_time, ko_time, ko_teams,
+                        overhead=1.0, spread=0.15, golden_goal=2.0, replications=5000, seed=None):
+    # Ereignisgesteuerte Simulation aller Replikationen gleichzeitig (eine Zeile je Replikation):
+    # jedes Spiel beginnt, sobald ein Tisch und beide Teams frei sind, KO-Spiele erst nach ihren Vorrunden-Spielen.
+    # Liefert Endzeiten in Minuten (P50, P90, Mittelwert) und die Anzahl der Spiele
+    rng = np.random.default_rng(seed)
+    num_tables = max(1, int(num_tables))
+    rows = np.arange(replications)
+
+    tables = np.zeros((replications, num_tables))
+    team_free = np.zeros((replications, num_groups * teams_per_group))
+
+    def play(ready, length):
+        # Frühester freier Tisch; Spiel dauert Spielzeit plus Wechselzeit
+        table = tables.argmin(axis=1)
+        start = np.maximum(ready, tables[rows, table])
+        end = start + length + overhead
+        tables[rows, table] = end
+        return end
+
+    fixtures = group_fixtures(num_groups, teams_per_group, num_tables)
+    group_lengths = durations(rng, replications, len(fixtures), group_time, spread)
+    for m, (t1, t2) in enumerate(fixtures):
+        end = play(np.maximum(team_free[:, t1], team_free[:, t2]), group_lengths[:, m])
+        team_free[:, t1] = end
+        team_free[:, t2] = end
+    group_end = team_free.max(axis=1) if fixtures else np.zeros(replications)
+
+    ko = ko_fixtures(ko_teams) if ko_teams >= 2 else []
+    ko_lengths = durations(rng, replications, len(ko), ko_time, spread, golden_goal)
+    ko_end = np.zeros((replications, len(ko)))
+    for m, deps in enumerate(ko):
+        ready = ko_end[:, list(deps)].max(axis=1) if deps else group_end
+        ko_end[:, m] = play(ready, ko_lengths[:, m])
+
+    end = np.maximum(group_end, ko_end.max(axis=1)) if ko else group_end
+    p50, p90 = np.percentile(end, [50, 90])
+    return {
+        "p50": float(p50),
+        "p90": float(p90),
+        "mean": float(end.mean()),
+        "group_matches": len(fixtures),
+        "ko_matches": len(ko)
+    }
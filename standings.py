@@ -0,0 +1,218 @@
+import numpy as np
+import pandas as pd
+
+STAT_KEYS = ["points", "games_played", "wins", "draws", "losses", "goals_for", "goals_against"]
+
+
+def parse_score(score):
+    # "g1:g2" -> (g1, g2); None, solange kein gültiges Ergebnis eingetragen ist ("-", "None:None", ...)
+    if not score or score == "-" or ":" not in score:
+        return None
+    try:
+        g1, g2 = map(int, score.split(":"))
+    except ValueError:
+        return None
+    return g1, g2
+
+
+def match_key(match):
+    return match.get("match_number", (match["team1"], match["team2"]))
+
+
+class GroupStandings:
+    # Tabelle einer Gruppe; Ergebnisse werden einzeln angewendet bzw. zurückgenommen (O(1) pro Spiel)
+    def __init__(self, team_names):
+        self.team_names = list(team_names)
+        self.table = {name: dict.fromkeys(STAT_KEYS, 0) for name in self.team_names}
+        self.scores = {}    # match key -> Ergebnis-String, wie zuletzt gesehen
+        self.applied = {}   # match key -> (team1, team2, g1, g2), das in der Tabelle steckt
+        # Direkter Vergleich: (team, gegner) -> [punkte, tore, gegentore] aus Sicht von team
+        self.head_to_head = {}
+
+    def add_head_to_head(self, team, opponent, goals, goals_against, sign):
+        entry = self.head_to_head.setdefault((team, opponent), [0, 0, 0])
+        if goals > goals_against:
+            entry[0] += sign * 3
+        elif goals == goals_against:
+            entry[0] += sign
+        entry[1] += sign * goals
+        entry[2] += sign * goals_against
+
+    def add(self, team1, team2, g1, g2, sign):
+        t1 = self.table[team1]
+        t2 = self.table[team2]
+        if team1 != team2:
+            self.add_head_to_head(team1, team2, g1, g2, sign)
+            self.add_head_to_head(team2, team1, g2, g1, sign)
+        t1["games_played"] += sign
+        t2["games_played"] += sign
+        t1["goals_for"] += sign * g1
+        t1["goals_against"] += sign * g2
+        t2["goals_for"] += sign * g2
+        t2["goals_against"] += sign * g1
+        if g1 > g2:
+            t1["points"] += sign * 3
+            t1["wins"] += sign
+            t2["losses"] += sign
+        elif g2 > g1:
+            t2["points"] += sign * 3
+            t2["wins"] += sign
+            t1["losses"] += sign
+        else:
+            t1["points"] += sign
+            t2["points"] += sign
+            t1["draws"] += sign
+            t2["draws"] += sign
+
+    def set_result(self, key, team1, team2, score):
+        # Altes Ergebnis zurücknehmen, neues anwenden (auch für Korrekturen)
+        self.scores[key] = score
+        old = self.applied.pop(key, None)
+        if old:
+            self.add(*old, -1)
+        parsed = parse_score(score)
+        if parsed and team1 in self.table and team2 in self.table:
+            self.add(team1, team2, *parsed, 1)
+            self.applied[key] = (team1, team2, *parsed)
+
+    def sync(self, matches):
+        # Nur Spiele mit geändertem Ergebnis neu anwenden (z.B. nach Übernahme fremder Änderungen)
+        keys = set()
+        for match in matches:
+            key = match_key(match)
+            keys.add(key)
+            score = match.get("score", "-")
+            if self.scores.get(key) != score:
+                self.set_result(key, match["team1"], match["team2"], score)
+        # Spiele, die es nicht mehr gibt (neuer Spielplan), wieder herausnehmen
+        if len(keys) != len(self.scores):
+            for key in [k for k in self.scores if k not in keys]:
+                self.set_result(key, None, None, "-")
+                del self.scores[key]
+
+    def mini_table(self, team, tied):
+        # Punkte, Tordifferenz und Tore von team nur aus den Spielen gegen die anderen punktgleichen Teams
+        points = goals = goals_against = 0
+        for opponent in tied:
+            entry = self.head_to_head.get((team, opponent))
+            if entry:
+                points += entry[0]
+                goals += entry[1]
+                goals_against += entry[2]
+        return points, goals - goals_against, goals
+
+    def ranking(self):
+        # Punkte, dann bei Punktgleichheit: direkter Vergleich (Punkte, Tordifferenz, Tore),
+        # danach Tordifferenz und Tore insgesamt; sonst bleibt die Reihenfolge der Gruppe
+        by_points = {}
+        for name in self.team_names:
+            by_points.setdefault(self.table[name]["points"], []).append(name)
+
+        order = []
+        for points in sorted(by_points, reverse=True):
+            tied = by_points[points]
+            if len(tied) > 1:
+                def tiebreak(name):
+                    stats = self.table[name]
+                    direct = self.mini_table(name, tied)
+                    return direct + (stats["goals_for"] - stats["goals_against"], stats["goals_for"])
+                tied = sorted(tied, key=tiebreak, reverse=True)
+            order.extend(tied)
+        return order
+
+
+def ranked_frame(standings):
+    # Tabelle in Ranglisten-Reihenfolge mit Tordifferenz und Rang (für Anzeige und KO-Setzliste)
+    df = pd.DataFrame(
+        [dict(name=name, **standings.table[name]) for name in standings.ranking()],
+        columns=["name"] + STAT_KEYS
+    )
+    df["Tordifferenz"] = df["goals_for"] - df["goals_against"]
+    df["Rang"] = range(1, len(df) + 1)
+    return df
+
+
+# Gleiche Regeln wie parse_score (int() erlaubt Leerzeichen, Vorzeichen und "_")
+SCORE_PATTERN = r"^\s*([+-]?\d+(?:_\d+)*)\s*:\s*([+-]?\d+(?:_\d+)*)\s*$"
+
+RANKING = ["points", "Tordifferenz", "goals_for"]
+
+
+def match_arrays(team_names, matches):
+    # Spiele in Spalten umwandeln: Index Team 1, Index Team 2, Tore 1, Tore 2 (nur gültige Ergebnisse)
+    index = {name: i for i, name in enumerate(team_names)}
+    frame = pd.DataFrame(list(matches), columns=["team1", "team2", "score"])
+    goals = frame["score"].astype(str).str.extract(SCORE_PATTERN)
+    team1 = frame["team1"].map(index)
+    team2 = frame["team2"].map(index)
+    valid = goals.notna().all(axis=1) & team1.notna() & team2.notna()
+    return (
+        team1[valid].to_numpy(dtype=np.int64),
+        team2[valid].to_numpy(dtype=np.int64),
+        goals.loc[valid, 0].str.replace("_", "").astype(np.int64).to_numpy(),
+        goals.loc[valid, 1].str.replace("_", "").astype(np.int64).to_numpy()
+    )
+
+
+def compute_standings(team_names, team1, team2, goals1, goals2):
+    # Ganze Tabelle in einem Durchlauf über Spalten-Arrays (auch für tausende Spiele)
+    n = len(team_names)
+
+    def per_team(weights1, weights2):
+        return (
+            np.bincount(team1, weights=weights1, minlength=n) + np.bincount(team2, weights=weights2, minlength=n)
+        ).astype(np.int64)
+
+    ones = np.ones(len(team1))
+    win1 = goals1 > goals2
+    win2 = goals2 > goals1
+    draw = ~(win1 | win2)
+
+    wins = per_team(win1, win2)
+    draws = per_team(draw, draw)
+    df = pd.DataFrame({
+        "name": list(team_names),
+        "points": 3 * wins + draws,
+        "games_played": per_team(ones, ones),
+        "wins": wins,
+        "draws": draws,
+        "losses": per_team(win2, win1),
+        "goals_for": per_team(goals1, goals2),
+        "goals_against": per_team(goals2, goals1)
+    })
+    return df
+
+
+def rank_table(df):
+    # Reihenfolge nach Punkten, Tordifferenz, erzielten Tore (ohne direkten Vergleich)
+    df = df.assign(Tordifferenz=df["goals_for"] - df["goals_against"])
+    df = df.sort_values(by=RANKING, ascending=False, kind="stable").reset_index(drop=True)
+    df["Rang"] = df.index + 1
+    return df
+
+
+def standings_frame(team_names, matches):
+    # Sortierte Tabelle mit Tordifferenz und Rang für beliebig viele Spiele (z.B. Gesamttabelle)
+    return rank_table(compute_standings(team_names, *match_arrays(team_names, matches)))
+
+
+def recompute(team_names, matches):
+    # Volle Neuberechnung (vektorisiert), nur zur Kontrolle (verify=True und tests/test_standings.py)
+    df = compute_standings(team_names, *match_arrays(team_names, matches))
+    return {row.pop("name"): {k: int(v) for k, v in row.items()} for row in df.to_dict("records")}
+
+
+def group_standings(cache, key, team_names, matches, verify=False):
+    # Gecachte Tabelle einer Gruppe holen und mit den aktuellen Ergebnissen abgleichen.
+    # Neu aufgebaut wird nur, wenn sich die Teams der Gruppe geändert haben oder
+    # die Kontrolle (verify=True) eine Abweichung zur vollen Neuberechnung findet.
+    standings = cache.get(key)
+    if standings is None or standings.team_names != list(team_names):
+        standings = GroupStandings(team_names)
+        cache[key] = standings
+    standings.sync(matches)
+    if verify and standings.table != recompute(team_names, matches):
+        standings = GroupStandings(team_names)
+        standings.sync(matches)
+        cache[key] = standings
+    return standings
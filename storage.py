@@ -0,0 +1,576 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote, quote_plus
+
+# Speicher-Engines hinter load_data/save_data.
+# Alle Engines bieten pro Collection dieselben Operationen:
+#   get(doc_id, fields)                      -> Dokument (optional nur bestimmte Felder) oder None
+#   update(doc_id, sets, unsets, ...)        -> $set/$unset mit Punkt-Pfaden, optional mit rev-Prüfung;
+#                                               bump_rev erhöht rev um 1 (True) bzw. um die angegebene Zahl,
+#                                               incs addiert Zahlen an Punkt-Pfaden ($inc, z.B. für Zähler)
+#   insert_if_missing(doc_id, doc)           -> Dokument nur anlegen, wenn es noch nicht existiert
+#   delete(doc_id)
+# Für Event-Logs (fortlaufende Nummer seq pro key):
+#   append(key, seq, doc)                    -> False, wenn seq für key schon existiert
+#   read_since(key, after_seq)               -> alle Einträge mit seq > after_seq, aufsteigend
+#   last_seq(key)                            -> höchste seq oder 0
+
+
+def apply_paths(root, sets, unsets):
+    # $set/$unset mit Punkt-Pfaden auf ein verschachteltes Dict anwenden
+    for path, value in sets.items():
+        *parents, last = path.split(".")
+        node = root
+        for part in parents:
+            if isinstance(node, list):
+                node = node[int(part)]
+            else:
+                node = node.setdefault(part, {})
+        if isinstance(node, list):
+            node[int(last)] = copy.deepcopy(value)
+        else:
+            node[last] = copy.deepcopy(value)
+    for path in unsets:
+        *parents, last = path.split(".")
+        node = root
+        for part in parents:
+            node = node[int(part)] if isinstance(node, list) else node.get(part, {})
+        if isinstance(node, dict):
+            node.pop(last, None)
+
+
+def apply_incs(root, incs):
+    # $inc mit Punkt-Pfaden: fehlende Werte zählen als 0
+    for path, delta in incs.items():
+        *parents, last = path.split(".")
+        node = root
+        for part in parents:
+            node = node[int(part)] if isinstance(node, list) else node.setdefault(part, {})
+        if isinstance(node, list):
+            node[int(last)] += delta
+        else:
+            node[last] = node.get(last, 0) + delta
+
+
+def project(doc, fields):
+    if doc is None or fields is None:
+        return doc
+    return {key: doc[key] for key in ["_id"] + list(fields) if key in doc}
+
+
+# --- MongoDB ---
+
+class MongoCollection:
+    def __init__(self, collection):
+        self.collection = collection
+        self.sequence_indexed = False
+
+    def get(self, doc_id, fields=None):
+        projection = {field: 1 for field in fields} if fields is not None else None
+        return self.collection.find_one({"_id": doc_id}, projection)
+
+    def update(self, doc_id, sets=None, unsets=None, bump_rev=False, expected_rev=None, upsert=False, incs=None):
+        query = {"_id": doc_id}
+        if expected_rev is not None:
+            # Migrierte Dokumente haben noch kein rev-Feld
+            query["rev"] = {"$in": [0, None]} if expected_rev == 0 else expected_rev
+
+        update = {}
+        if sets:
+            update["$set"] = sets
+        if unsets:
+            update["$unset"] = {path: "" for path in unsets}
+        if incs:
+            update["$inc"] = dict(incs)
+        if bump_rev:
+            update.setdefault("$inc", {})["rev"] = int(bump_rev)
+        result = self.collection.update_one(query, update, upsert=upsert)
+        return result.matched_count == 1 or result.upserted_id is not None
+
+    def insert_if_missing(self, doc_id, doc):
+        self.collection.update_one({"_id": doc_id}, {"$setOnInsert": doc}, upsert=True)
+
+    def delete(self, doc_id):
+        self.collection.delete_one({"_id": doc_id})
+
+    def ensure_sequence_index(self):
+        if not self.sequence_indexed:
+            self.collection.create_index([("key", 1), ("seq", 1)], unique=True)
+            self.sequence_indexed = True
+
+    def append(self, key, seq, doc):
+        from pymongo.errors import DuplicateKeyError
+
+        self.ensure_sequence_index()
+        try:
+            self.collection.insert_one(dict(doc, _id=f"{key}:{seq}", key=key, seq=seq))
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def read_since(self, key, after_seq):
+        self.ensure_sequence_index()
+        return list(self.collection.find({"key": key, "seq": {"$gt": after_seq}}).sort("seq", 1))
+
+    def last_seq(self, key):
+        self.ensure_sequence_index()
+        doc = self.collection.find_one({"key": key}, {"seq": 1}, sort=[("seq", -1)])
+        return doc["seq"] if doc else 0
+
+
+class MongoStore:
+    def __init__(self, secrets, database="Wuzzelapp"):
+        from pymongo import MongoClient
+
+        # Username und Passwort URL-kodieren
+        username = quote_plus(secrets["MONGO_USERNAME"])
+        password = quote_plus(secrets["MONGO_PASSWORD"])
+        cluster = secrets["MONGO_CLUSTER"]
+
+        # Verbindungs-URI zusammensetzen
+        uri = f"mongodb+srv://{username}:{password}@{cluster}/?retryWrites=true&w=majority&appName=Cluster0"
+        self.client = MongoClient(uri)
+        self.db = self.client[database]
+
+    def collection(self, name):
+        return MongoCollection(self.db[name])
+
+
+# --- Lokale Engines (SQLite / JSON-Dateien) ---
+
+class LocalCollection:
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def get(self, doc_id, fields=None):
+        with self.store.lock:
+            return project(self.store.read(self.name, doc_id), fields)
+
+    def update(self, doc_id, sets=None, unsets=None, bump_rev=False, expected_rev=None, upsert=False, incs=None):
+        with self.store.transaction():
+            doc = self.store.read(self.name, doc_id)
+            if doc is None:
+                if not upsert:
+                    return False
+                doc = {"_id": doc_id}
+            elif expected_rev is not None and doc.get("rev", 0) != expected_rev:
+                return False
+
+            apply_paths(doc, sets or {}, unsets or [])
+            apply_incs(doc, incs or {})
+            if bump_rev:
+                doc["rev"] = doc.get("rev", 0) + int(bump_rev)
+            self.store.write(self.name, doc_id, doc)
+            return True
+
+    def insert_if_missing(self, doc_id, doc):
+        with self.store.transaction():
+            if self.store.read(self.name, doc_id) is None:
+                self.store.write(self.name, doc_id, dict(doc, _id=doc_id))
+
+    def delete(self, doc_id):
+        with self.store.transaction():
+            self.store.delete(self.name, doc_id)
+
+    def append(self, key, seq, doc):
+        with self.store.transaction():
+            return self.store.append(self.name, key, seq, dict(doc, key=key, seq=seq))
+
+    def read_since(self, key, after_seq):
+        with self.store.lock:
+            return self.store.read_since(self.name, key, after_seq)
+
+    def last_seq(self, key):
+        with self.store.lock:
+            return self.store.last_seq(self.name, key)
+
+
+class SQLiteStore:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "coll TEXT NOT NULL, id TEXT NOT NULL, body TEXT NOT NULL, PRIMARY KEY (coll, id))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sequences ("
+            "coll TEXT NOT NULL, key TEXT NOT NULL, seq INTEGER NOT NULL, body TEXT NOT NULL, "
+            "PRIMARY KEY (coll, key, seq))"
+        )
+
+    @contextmanager
+    def transaction(self):
+        # BEGIN IMMEDIATE sperrt auch gegen andere Prozesse, die dieselbe Datei benutzen
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def read(self, coll, doc_id):
+        row = self.conn.execute("SELECT body FROM documents WHERE coll = ? AND id = ?", (coll, doc_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write(self, coll, doc_id, doc):
+        self.conn.execute(
+            "INSERT INTO documents (coll, id, body) VALUES (?, ?, ?) "
+            "ON CONFLICT (coll, id) DO UPDATE SET body = excluded.body",
+            (coll, doc_id, json.dumps(doc))
+        )
+
+    def delete(self, coll, doc_id):
+        self.conn.execute("DELETE FROM documents WHERE coll = ? AND id = ?", (coll, doc_id))
+
+    def append(self, coll, key, seq, doc):
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO sequences (coll, key, seq, body) VALUES (?, ?, ?, ?)",
+            (coll, key, seq, json.dumps(doc))
+        )
+        return cursor.rowcount == 1
+
+    def read_since(self, coll, key, after_seq):
+        rows = self.conn.execute(
+            "SELECT body FROM sequences WHERE coll = ? AND key = ? AND seq > ? ORDER BY seq",
+            (coll, key, after_seq)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def last_seq(self, coll, key):
+        row = self.conn.execute("SELECT MAX(seq) FROM sequences WHERE coll = ? AND key = ?", (coll, key)).fetchone()
+        return row[0] or 0
+
+    def collection(self, name):
+        return LocalCollection(self, name)
+
+
+class JsonFileStore:
+    # Ein Verzeichnis pro Collection, eine Datei pro Dokument
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            yield
+
+    def file_path(self, coll, doc_id):
+        return os.path.join(self.path, quote(coll, safe=""), quote(doc_id, safe="") + ".json")
+
+    def read(self, coll, doc_id):
+        try:
+            with open(self.file_path(coll, doc_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write(self, coll, doc_id, doc):
+        path = self.file_path(coll, doc_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Erst in eine temporäre Datei schreiben, dann atomar ersetzen
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def delete(self, coll, doc_id):
+        try:
+            os.remove(self.file_path(coll, doc_id))
+        except FileNotFoundError:
+            pass
+
+    # Event-Logs: ein Verzeichnis pro key, eine Datei pro seq
+    def sequence_dir(self, coll, key):
+        return os.path.join(self.path, quote(coll, safe=""), quote(key, safe=""))
+
+    def sequence_numbers(self, coll, key):
+        try:
+            names = os.listdir(self.sequence_dir(coll, key))
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-5]) for name in names if name.endswith(".json"))
+
+    def append(self, coll, key, seq, doc):
+        directory = self.sequence_dir(coll, key)
+        os.makedirs(directory, exist_ok=True)
+        try:
+            # O_EXCL: schlägt fehl, wenn die Nummer schon vergeben ist
+            fd = os.open(os.path.join(directory, f"{seq:010d}.json"), os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False)
+        return True
+
+    def read_since(self, coll, key, after_seq):
+        docs = []
+        for seq in self.sequence_numbers(coll, key):
+            if seq > after_seq:
+                with open(os.path.join(self.sequence_dir(coll, key), f"{seq:010d}.json"), encoding="utf-8") as f:
+                    docs.append(json.load(f))
+        return docs
+
+    def last_seq(self, coll, key):
+        numbers = self.sequence_numbers(coll, key)
+        return numbers[-1] if numbers else 0
+
+    def collection(self, name):
+        return LocalCollection(self, name)
+
+
+# --- Write-Behind ---
+
+def is_under(path, parent):
+    return path == parent or path.startswith(parent + ".")
+
+
+def set_under(sets, parent, path, value):
+    # Wert an einem Unterpfad von parent setzen (parent ist schon in sets oder wird neu angelegt)
+    wrapper = {"value": sets.get(parent, {})}
+    apply_paths(wrapper, {"value" + path[len(parent):]: value}, [])
+    sets[parent] = wrapper["value"]
+
+
+def merge_update(first, second):
+    # Zwei aufeinanderfolgende Updates desselben Dokuments zu einem zusammenfassen.
+    # Das Ergebnis enthält keine Pfade, die sich überschneiden (MongoDB lehnt solche Updates ab):
+    # Unterpfade werden in den gesetzten bzw. entfernten Elternpfad eingearbeitet.
+    sets = dict(first["sets"])
+    unsets = list(first["unsets"])
+    incs = dict(first["incs"])
+
+    for path, value in second["sets"].items():
+        sets = {p: v for p, v in sets.items() if not is_under(p, path)}
+        unsets = [p for p in unsets if not is_under(p, path)]
+        incs = {p: d for p, d in incs.items() if not is_under(p, path)}
+        parent = next((p for p in sets if is_under(path, p)), None)
+        removed = next((p for p in unsets if is_under(path, p)), None)
+        if parent is not None:
+            # Unterpfad eines bereits gesetzten Werts -> direkt in diesen Wert schreiben
+            set_under(sets, parent, path, value)
+        elif removed is not None:
+            # Unterpfad eines entfernten Werts -> Elternpfad neu setzen, nur mit diesem Wert
+            unsets.remove(removed)
+            set_under(sets, removed, path, value)
+        else:
+            sets[path] = value
+
+    for path in second["unsets"]:
+        if any(is_under(path, p) for p in unsets):
+            # Schon mit dem Elternpfad entfernt
+            continue
+        if any(path != p and is_under(path, p) for p in incs):
+            # Unterpfad eines Zählers existiert nicht
+            continue
+        sets = {p: v for p, v in sets.items() if not is_under(p, path)}
+        unsets = [p for p in unsets if not is_under(p, path)]
+        incs = {p: d for p, d in incs.items() if not is_under(p, path)}
+        parent = next((p for p in sets if is_under(path, p)), None)
+        if parent is None:
+            unsets.append(path)
+        else:
+            wrapper = {"value": sets[parent]}
+            apply_paths(wrapper, {}, ["value" + path[len(parent):]])
+            sets[parent] = wrapper["value"]
+
+    for path, delta in second["incs"].items():
+        # Ein Zähler ist eine Zahl, frühere Änderungen darunter sind damit gegenstandslos
+        sets = {p: v for p, v in sets.items() if p == path or not is_under(p, path)}
+        unsets = [p for p in unsets if p == path or not is_under(p, path)]
+        incs = {p: d for p, d in incs.items() if p == path or not is_under(p, path)}
+        parent = next((p for p in sets if is_under(path, p)), None)
+        removed = next((p for p in unsets if is_under(path, p)), None)
+        if parent is not None:
+            # Zähler in einem bereits gesetzten Wert -> im Wert hochzählen
+            wrapper = {"value": sets[parent]}
+            apply_incs(wrapper, {"value" + path[len(parent):]: delta})
+            sets[parent] = wrapper["value"]
+        elif removed is not None:
+            # Nach dem Entfernen beginnt der Zähler wieder bei 0
+            unsets.remove(removed)
+            set_under(sets, removed, path, delta)
+        else:
+            incs[path] = incs.get(path, 0) + delta
+
+    return {
+        "sets": sets,
+        "unsets": unsets,
+        "incs": incs,
+        # Jeder zusammengefasste Save erhöht rev, damit andere Sessions die Änderung erkennen
+        "inc": first["inc"] + second["inc"],
+        "upsert": first["upsert"] or second["upsert"],
+        "attempts": max(first["attempts"], second["attempts"])
+    }
+
+
+class WriteBehindCollection:
+    # Saves landen sofort in einer Warteschlange; ein Hintergrund-Thread fasst alle
+    # Saves innerhalb von `window` Sekunden pro Dokument zu einem Schreibvorgang zusammen.
+    # Lesezugriffe sehen die noch ausstehenden Änderungen (read-your-writes).
+    def __init__(self, inner, window=0.5, max_pending=100, max_attempts=5):
+        self.inner = inner
+        self.window = window
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.cond = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.pending = {}
+        self.in_flight = {}
+        self.pending_writes = 0
+        self.in_flight_writes = 0
+        self.last_flush_latency = None
+        self.last_error = None
+        # Dokumente, deren Änderungen nach max_attempts Fehlversuchen verworfen wurden
+        self.dropped = []
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name="write-behind", daemon=True)
+        self.thread.start()
+
+    def stats(self):
+        with self.cond:
+            return {
+                "pending": self.pending_writes + self.in_flight_writes,
+                "last_flush_latency": self.last_flush_latency,
+                "last_error": self.last_error,
+                "dropped": list(self.dropped)
+            }
+
+    def has_pending(self, doc_id):
+        # Noch nicht (vollständig) geschriebene Änderungen für dieses Dokument?
+        with self.cond:
+            return doc_id in self.pending or doc_id in self.in_flight
+
+    def get(self, doc_id, fields=None):
+        with self.write_lock:
+            with self.cond:
+                updates = [u for u in (self.in_flight.get(doc_id), self.pending.get(doc_id)) if u]
+            if not updates:
+                return self.inner.get(doc_id, fields)
+            doc = self.inner.get(doc_id)
+        if doc is None:
+            doc = {"_id": doc_id}
+        for update in updates:
+            apply_paths(doc, update["sets"], update["unsets"])
+            apply_incs(doc, update["incs"])
+            if update["inc"]:
+                doc["rev"] = doc.get("rev", 0) + update["inc"]
+        return project(doc, fields)
+
+    def update(self, doc_id, sets=None, unsets=None, bump_rev=False, expected_rev=None, upsert=False, incs=None):
+        # expected_rev kann hier nicht geprüft werden, die Änderung wird erst später geschrieben
+        update = {
+            "sets": dict(sets or {}), "unsets": list(unsets or []), "incs": dict(incs or {}),
+            "inc": int(bump_rev), "upsert": upsert, "attempts": 0
+        }
+        with self.cond:
+            # Begrenzte Warteschlange: bei zu vielen offenen Saves blockieren, bis geschrieben wurde
+            while self.pending_writes >= self.max_pending and not self.closed:
+                self.cond.wait()
+            if doc_id in self.pending:
+                update = merge_update(self.pending[doc_id], update)
+            self.pending[doc_id] = copy.deepcopy(update)
+            self.pending_writes += 1
+            self.cond.notify_all()
+        return True
+
+    def insert_if_missing(self, doc_id, doc):
+        self.flush()
+        self.inner.insert_if_missing(doc_id, doc)
+
+    def delete(self, doc_id):
+        # Ausstehende Saves zuerst schreiben, sonst würden sie das Dokument wieder anlegen
+        self.flush()
+        self.inner.delete(doc_id)
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending and self.closed:
+                    return
+            if not self.closed:
+                # Weitere Saves im Zeitfenster sammeln
+                time.sleep(self.window)
+
+            with self.write_lock:
+                with self.cond:
+                    batch, self.pending = self.pending, {}
+                    self.in_flight = batch
+                    self.in_flight_writes, self.pending_writes = self.pending_writes, 0
+                    self.cond.notify_all()
+
+                start = time.perf_counter()
+                failed = {}
+                for doc_id, update in batch.items():
+                    try:
+                        self.inner.update(doc_id, update["sets"], update["unsets"],
+                                          bump_rev=update["inc"], upsert=update["upsert"], incs=update["incs"])
+                    except Exception as e:
+                        self.last_error = repr(e)
+                        update["attempts"] += 1
+                        if update["attempts"] < self.max_attempts:
+                            failed[doc_id] = update
+                        else:
+                            # Nicht endlos wiederholen (z.B. ein Update, das die Datenbank immer ablehnt)
+                            with self.cond:
+                                self.dropped.append(doc_id)
+
+                with self.cond:
+                    self.in_flight = {}
+                    if failed:
+                        # Fehlgeschlagene Schreibvorgänge vor die neueren Änderungen stellen
+                        for doc_id, update in failed.items():
+                            if doc_id in self.pending:
+                                update = merge_update(update, self.pending[doc_id])
+                            self.pending[doc_id] = update
+                        self.pending_writes += len(failed)
+                    else:
+                        self.last_error = None
+                    self.in_flight_writes = 0
+                    self.last_flush_latency = time.perf_counter() - start
+                    self.cond.notify_all()
+
+            if failed and not self.closed:
+                time.sleep(1)
+
+    def flush(self, timeout=None):
+        # Warten, bis alle ausstehenden Saves geschrieben sind
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while self.pending or self.in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+        return True
+
+    def close(self, timeout=10):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(timeout)
+
+
+def open_store(config, mongo_secrets=None):
+    # config: {"engine": "mongo" | "sqlite" | "json", "path": ...}
+    engine = config.get("engine", "mongo")
+    if engine == "mongo":
+        return MongoStore(mongo_secrets)
+    if engine == "sqlite":
+        return SQLiteStore(config.get("path", "wuzzelapp.db"))
+    if engine == "json":
+        return JsonFileStore(config.get("path", "wuzzelapp_data"))
+    raise ValueError(f"Unbekannte Speicher-Engine: {engine}")
@@ -0,0 +1,144 @@
+import math
+import pandas as pd
+from standings import parse_score
+
+# Abbruch der Rückverfolgung bei der Paarung; danach sind Wiederholungsspiele erlaubt
+MAX_PAIRING_STEPS = 20000
+
+
+def suggested_rounds(num_teams):
+    # Genug Runden, damit sich an der Spitze ein eindeutiges Feld ergibt
+    return max(1, math.ceil(math.log2(max(2, num_teams)))) + 1
+
+
+def swiss_table(team_names, rounds):
+    # Tabelle aus allen Runden: Punkte (Sieg 3, Unentschieden 1, Freilos 3), Tore, Gegner und Buchholz
+    table = {
+        name: {"points": 0, "games_played": 0, "wins": 0, "draws": 0, "losses": 0,
+               "goals_for": 0, "goals_against": 0, "byes": 0, "opponents": []}
+        for name in team_names
+    }
+    for matches in rounds:
+        for match in matches:
+            if match.get("bye"):
+                if match["team1"] in table:
+                    table[match["team1"]]["points"] += 3
+                    table[match["team1"]]["byes"] += 1
+                continue
+            t1, t2 = table.get(match["team1"]), table.get(match["team2"])
+            if t1 is None or t2 is None:
+                continue
+            # Gepaart ist gepaart, auch wenn das Ergebnis noch fehlt
+            t1["opponents"].append(match["team2"])
+            t2["opponents"].append(match["team1"])
+            parsed = parse_score(match.get("score"))
+            if not parsed:
+                continue
+            g1, g2 = parsed
+            for stats, goals, against in ((t1, g1, g2), (t2, g2, g1)):
+                stats["games_played"] += 1
+                stats["goals_for"] += goals
+                stats["goals_against"] += against
+                if goals > against:
+                    stats["points"] += 3
+                    stats["wins"] += 1
+                elif goals == against:
+                    stats["points"] += 1
+                    stats["draws"] += 1
+                else:
+                    stats["losses"] += 1
+    for stats in table.values():
+        # Buchholz: Summe der Punkte aller bisherigen Gegner
+        stats["buchholz"] = sum(table[o]["points"] for o in stats["opponents"])
+    return table
+
+
+def swiss_ranking(table, team_names):
+    # Punkte, Buchholz, Tordifferenz, Tore; sonst Reihenfolge der Teamliste
+    position = {name: i for i, name in enumerate(team_names)}
+
+    def key(name):
+        s = table[name]
+        return (-s["points"], -s["buchholz"], -(s["goals_for"] - s["goals_against"]), -s["goals_for"], position[name])
+
+    return sorted(team_names, key=key)
+
+
+def swiss_frame(team_names, rounds):
+    # Tabelle als DataFrame in Ranglisten-Reihenfolge (auch für die KO-Qualifikation)
+    table = swiss_table(team_names, rounds)
+    df = pd.DataFrame(
+        [
+            {"name": name, **{k: v for k, v in table[name].items() if k != "opponents"}}
+            for name in swiss_ranking(table, team_names)
+        ],
+        columns=["name", "points", "games_played", "wins", "draws", "losses",
+                 "goals_for", "goals_against", "byes", "buchholz"]
+    )
+    df["Tordifferenz"] = df["goals_for"] - df["goals_against"]
+    df["Rang"] = range(1, len(df) + 1)
+    return df
+
+
+def pair_teams(order, played):
+    # Paarung von oben nach unten: jedes Team bekommt den nächstplatzierten freien Gegner,
+    # gegen den es noch nicht gespielt hat; passt es am Ende nicht, wird zurückgegangen.
+    # order: Teams nach aktueller Platzierung (gerade Anzahl), played: Menge der bisherigen Paare
+    steps = 0
+    pairs = []
+    paired = set()
+
+    def solve(start):
+        nonlocal steps
+        while start < len(order) and order[start] in paired:
+            start += 1
+        if start == len(order):
+            return True
+        team = order[start]
+        paired.add(team)
+        for opponent in order[start + 1:]:
+            if opponent in paired or frozenset((team, opponent)) in played:
+                continue
+            steps += 1
+            if steps > MAX_PAIRING_STEPS:
+                break
+            paired.add(opponent)
+            pairs.append((team, opponent))
+            if solve(start + 1):
+                return True
+            pairs.pop()
+            paired.discard(opponent)
+        paired.discard(team)
+        return False
+
+    if solve(0):
+        return pairs
+    # Keine Paarung ohne Wiederholung gefunden: der Reihe nach paaren
+    return [(order[i], order[i + 1]) for i in range(0, len(order), 2)]
+
+
+def next_round(team_names, rounds, match_number=1):
+    # Neue Runde nach aktuellem Stand; bei ungerader Anzahl bekommt das schwächste Team
+    # ohne bisheriges Freilos ein Freilos
+    table = swiss_table(team_names, rounds)
+    order = swiss_ranking(table, team_names)
+    played = {frozenset((name, o)) for name in team_names for o in table[name]["opponents"]}
+
+    bye = None
+    if len(order) % 2:
+        bye = next((name for name in reversed(order) if not table[name]["byes"]), order[-1])
+        order.remove(bye)
+
+    matches = []
+    for t1, t2 in pair_teams(order, played):
+        matches.append({
+            "match_number": match_number,
+            "team1": t1,
+            "team2": t2,
+            "score": "-",
+            "color": "Rot vs Blau"
+        })
+        match_number += 1
+    if bye is not None:
+        matches.append({"team1": bye, "team2": None, "score": "-", "bye": True})
+    return matches
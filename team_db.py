@@ -0,0 +1,255 @@
+import csv
+import io
+import threading
+import time
+import uuid
+import pandas as pd
+import streamlit as st
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.engine import URL
+
+TEAM_COLUMNS = ["id", "name", "player_1", "player_2", "timestamp"]
+
+# Frühestens nach so vielen Sekunden wird nach neuen/geänderten Teams gefragt
+DELTA_INTERVAL = 30
+# Voller Abgleich (erkennt auch gelöschte Teams)
+FULL_SYNC_INTERVAL = 30 * 60
+# Treffer pro Seite in der Teamsuche
+PAGE_SIZE = 25
+
+# Indizes für Suche (Präfix auf Team- und Spielernamen), Blättern (name, id) und den Delta-Abgleich
+TEAM_INDEXES = {
+    "idx_teams_name_id": "CREATE INDEX idx_teams_name_id ON teams (name, id)",
+    "idx_teams_player_1": "CREATE INDEX idx_teams_player_1 ON teams (player_1)",
+    "idx_teams_player_2": "CREATE INDEX idx_teams_player_2 ON teams (player_2)",
+    "idx_teams_timestamp": "CREATE INDEX idx_teams_timestamp ON teams (timestamp)"
+}
+
+
+@st.cache_resource
+def get_engine():
+    # Eine Engine mit Connection-Pool pro Prozess, Zugangsdaten aus st.secrets["mysql"]
+    db_config = st.secrets["mysql"]
+    url = URL.create(
+        "mysql+mysqlconnector",
+        username=db_config["user"],
+        password=db_config["password"],
+        host=db_config["host"],
+        port=db_config.get("port"),
+        database=db_config["database"]
+    )
+    return create_engine(url, pool_size=5, max_overflow=5, pool_recycle=3600, pool_pre_ping=True)
+
+
+class TeamDirectory:
+    # Lokale Kopie der teams-Tabelle; holt nur Zeilen, deren timestamp neuer als der letzte Abgleich ist
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frame = None
+        self.by_name = {}
+        self.watermark = None
+        self.last_full_sync = 0
+        self.last_check = 0
+
+    def full_sync(self, conn):
+        query = text(f"SELECT {', '.join(TEAM_COLUMNS)} FROM teams ORDER BY name")
+        self.frame = pd.read_sql(query, conn)
+        # Index Name -> Zeile, damit der Import nicht pro Team den ganzen DataFrame durchsucht
+        self.by_name = {row["name"]: row for row in self.frame.to_dict("records")}
+        self.last_full_sync = time.monotonic()
+
+    def delta_sync(self, conn):
+        # >= statt >, damit Zeilen mit gleichem timestamp wie der letzte Abgleich nicht verloren gehen;
+        # doppelte Zeilen werden über die id zusammengeführt
+        query = text(f"SELECT {', '.join(TEAM_COLUMNS)} FROM teams WHERE timestamp >= :watermark")
+        changed = pd.read_sql(query, conn, params={"watermark": self.watermark})
+        if not changed.empty:
+            replaced = self.frame["id"].isin(changed["id"])
+            for name in self.frame.loc[replaced, "name"]:
+                self.by_name.pop(name, None)
+            self.frame = (
+                pd.concat([self.frame[~replaced], changed], ignore_index=True)
+                .sort_values("name", ignore_index=True)
+            )
+            self.by_name.update({row["name"]: row for row in changed.to_dict("records")})
+
+    def get(self, engine):
+        with self.lock:
+            now = time.monotonic()
+            if self.frame is not None and now - self.last_check < DELTA_INTERVAL:
+                return self.frame
+
+            with engine.connect() as conn:
+                if self.frame is None or self.watermark is None or now - self.last_full_sync > FULL_SYNC_INTERVAL:
+                    self.full_sync(conn)
+                else:
+                    self.delta_sync(conn)
+            watermark = self.frame["timestamp"].max() if not self.frame.empty else None
+            self.watermark = None if pd.isna(watermark) else watermark
+            self.last_check = now
+            return self.frame
+
+    def invalidate(self):
+        with self.lock:
+            self.frame = None
+
+
+@st.cache_resource
+def get_team_directory():
+    return TeamDirectory()
+
+
+def team_lookup():
+    # Name -> Zeile des Teamverzeichnisses
+    directory = get_team_directory()
+    directory.get(get_engine())
+    return directory.by_name
+
+
+def new_team(name, player_1, player_2):
+    return {
+        "name": name,
+        "players": [player_1, player_2],
+        "player_ids": [str(uuid.uuid4()), str(uuid.uuid4())],
+        "points": 0,
+        "games_played": 0,
+        "wins": 0,
+        "draws": 0,
+        "losses": 0,
+        "goals_for": 0,
+        "goals_against": 0
+    }
+
+
+def team_key(name):
+    return str(name).strip().casefold()
+
+
+def import_teams(teams, rows):
+    # rows: (name, player_1, player_2); ein Durchlauf, bereits vorhandene oder doppelte Namen werden übersprungen.
+    # Liefert (neue Teamliste, Anzahl übernommen, übersprungene Namen)
+    teams = list(teams)
+    seen = {team_key(t["name"]) for t in teams}
+    added, skipped = 0, []
+    for name, player_1, player_2 in rows:
+        key = team_key(name)
+        if not key or key in seen:
+            skipped.append(name)
+            continue
+        seen.add(key)
+        teams.append(new_team(str(name).strip(), player_1, player_2))
+        added += 1
+    return teams, added, skipped
+
+
+CSV_COLUMNS = {
+    "name": ["name", "team", "teamname"],
+    "player_1": ["player_1", "spieler_1", "spieler1", "player1"],
+    "player_2": ["player_2", "spieler_2", "spieler2", "player2"]
+}
+
+
+def read_csv_text(file):
+    # UTF-8 (auch mit BOM); sonst Windows-1252, z.B. CSV aus Excel mit Umlauten
+    raw = file.getvalue() if hasattr(file, "getvalue") else file.read()
+    try:
+        return raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return raw.decode("cp1252", errors="replace")
+
+
+def teams_from_csv(file):
+    # CSV mit Teamname und zwei Spielern (Trennzeichen , oder ; wird erkannt).
+    # Liefert (Zeilen als (name, player_1, player_2), Zeilennummern mit fehlenden Angaben)
+    content = read_csv_text(file)
+    if not content.strip():
+        raise ValueError("Die CSV-Datei ist leer.")
+    try:
+        try:
+            frame = pd.read_csv(io.StringIO(content), sep=None, engine="python", dtype=str)
+        except csv.Error:
+            # Trennzeichen nicht erkennbar (z.B. nur eine Spalte)
+            frame = pd.read_csv(io.StringIO(content), dtype=str)
+    except (csv.Error, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        raise ValueError(f"Die CSV-Datei konnte nicht gelesen werden: {e}")
+    frame = frame.fillna("")
+
+    columns = {str(c).strip().casefold(): c for c in frame.columns}
+    mapping = {}
+    for target, aliases in CSV_COLUMNS.items():
+        source = next((columns[a] for a in aliases if a in columns), None)
+        if source is None:
+            raise ValueError(f"Spalte '{target}' fehlt in der CSV-Datei.")
+        mapping[target] = source
+
+    rows, rejected = [], []
+    # Zeile 1 ist die Kopfzeile
+    for line, row in enumerate(frame.to_dict("records"), start=2):
+        values = tuple(row[mapping[target]].strip() for target in CSV_COLUMNS)
+        if all(values):
+            rows.append(values)
+        else:
+            rejected.append(line)
+    return rows, rejected
+
+
+def invalidate_teams():
+    # Nächster Zugriff macht einen vollen Abgleich
+    get_team_directory().invalidate()
+    search_teams.clear()
+
+
+@st.cache_resource
+def ensure_team_indexes():
+    # Fehlende Indizes einmal pro Prozess anlegen (MySQL kennt kein CREATE INDEX IF NOT EXISTS)
+    try:
+        with get_engine().begin() as conn:
+            existing = {
+                row[0] for row in conn.execute(text(
+                    "SELECT DISTINCT index_name FROM information_schema.statistics "
+                    "WHERE table_schema = DATABASE() AND table_name = 'teams'"
+                ))
+            }
+            for name, statement in TEAM_INDEXES.items():
+                if name not in existing:
+                    conn.execute(text(statement))
+        return True
+    except SQLAlchemyError:
+        # z.B. fehlende Rechte: Suche funktioniert trotzdem, nur ohne Index
+        return False
+
+
+def escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@st.cache_data(ttl=DELTA_INTERVAL, show_spinner=False)
+def search_teams(term="", after=None, limit=PAGE_SIZE):
+    # Suche nach Team- oder Spielername (Präfix) mit Keyset-Pagination über (name, id).
+    # after: (name, id) des letzten Treffers der vorherigen Seite.
+    # Liefert (Seite als DataFrame, Cursor für die nächste Seite oder None)
+    ensure_team_indexes()
+
+    conditions = []
+    params = {"limit": limit + 1}
+    term = term.strip()
+    if term:
+        conditions.append("(name LIKE :prefix OR player_1 LIKE :prefix OR player_2 LIKE :prefix)")
+        params["prefix"] = escape_like(term) + "%"
+    if after is not None:
+        conditions.append("(name > :after_name OR (name = :after_name AND id > :after_id))")
+        params["after_name"], params["after_id"] = after
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = text(f"SELECT {', '.join(TEAM_COLUMNS)} FROM teams {where} ORDER BY name, id LIMIT :limit")
+    with get_engine().connect() as conn:
+        page = pd.read_sql(query, conn, params=params)
+
+    # Eine Zeile mehr holen, um zu wissen, ob es eine nächste Seite gibt
+    next_cursor = None
+    if len(page) > limit:
+        page = page.iloc[:limit]
+        last = page.iloc[-1]
+        next_cursor = (last["name"], int(last["id"]))
+    return page, next_cursor
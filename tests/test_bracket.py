@@ -0,0 +1,105 @@
+import random
+from bracket import (build_bracket, build_double_bracket, final_match, is_finished, ko_matches,
+                     legacy_bracket, seed_order, set_score)
+
+
+def play_through(bracket, rng):
+    # Alle spielbaren Spiele mit zufälligem Sieger eintragen, bis keins mehr offen ist
+    while True:
+        open_matches = [
+            m for m in bracket["matches"].values()
+            if not m.get("bye") and m["team1"] and m["team2"] and m["score"] == "-"
+        ]
+        if not open_matches:
+            return
+        for match in open_matches:
+            score = rng.choice(["2:1", "0:3", "5:4"])
+            assert set_score(bracket, match["id"], score)
+
+
+def test_seed_order_keeps_top_seeds_apart():
+    assert seed_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+
+
+def test_single_elimination_completes():
+    rng = random.Random(21)
+    for num_teams in range(2, 33):
+        seeds = [f"T{i}" for i in range(1, num_teams + 1)]
+        bracket = build_bracket(seeds, third_place=True)
+        play_through(bracket, rng)
+
+        assert is_finished(bracket)
+        assert bracket["played"] == bracket["total"] == len(ko_matches(bracket))
+        # Ohne Spiel um Platz 3 braucht es genau n - 1 Spiele; jedes Team verliert höchstens einmal.
+        # Bei 3 Teams hat ein Halbfinale ein Freilos, dann entfällt das Spiel um Platz 3
+        third_place = 1 if num_teams >= 4 else 0
+        assert bracket["total"] == num_teams - 1 + third_place
+        losers = [m["team2"] if m["score"] in ("2:1", "5:4") else m["team1"]
+                  for m in ko_matches(bracket) if m["id"] != "P3"]
+        assert len(losers) == len(set(losers))
+
+
+def test_double_elimination_completes():
+    rng = random.Random(22)
+    for num_teams in range(3, 33):
+        seeds = [f"T{i}" for i in range(1, num_teams + 1)]
+        bracket = build_double_bracket(seeds, grand_final_reset=True)
+        play_through(bracket, rng)
+
+        assert is_finished(bracket)
+        assert bracket["played"] == bracket["total"]
+        losses = {}
+        for match in ko_matches(bracket):
+            g1, g2 = map(int, match["score"].split(":"))
+            loser = match["team2"] if g1 > g2 else match["team1"]
+            losses[loser] = losses.get(loser, 0) + 1
+        # Nur der Turniersieger verliert weniger als zweimal (höchstens einmal)
+        assert max(losses.values()) <= 2
+        assert sum(1 for name in seeds if losses.get(name, 0) < 2) == 1
+
+
+def test_correction_resets_following_matches():
+    bracket = build_bracket(["A", "B", "C", "D"], third_place=True)
+    set_score(bracket, "R1M1", "2:0")
+    set_score(bracket, "R1M2", "2:0")
+    set_score(bracket, "R2M1", "1:0")
+    assert is_finished(bracket)
+
+    # Korrektur im Halbfinale: anderer Sieger -> Finale wird zurückgesetzt
+    set_score(bracket, "R1M1", "0:2")
+    final = bracket["matches"]["R2M1"]
+    assert final["team1"] == "D"
+    assert final["score"] == "-"
+    assert not is_finished(bracket)
+    assert bracket["played"] == 2
+
+
+def test_draw_does_not_advance():
+    bracket = build_bracket(["A", "B", "C", "D"], third_place=False)
+    assert not set_score(bracket, "R1M1", "2:2")
+    assert bracket["matches"]["R2M1"]["team1"] is None
+
+
+def test_legacy_list_is_converted():
+    legacy = [
+        {"round": "Viertelfinale 1", "team1": "S1", "team2": "S8", "score": "2:1"},
+        {"round": "Viertelfinale 2", "team1": "S2", "team2": "S7", "score": "0:3"},
+        {"round": "Viertelfinale 3", "team1": "S3", "team2": "S6", "score": "5:4"},
+        {"round": "Viertelfinale 4", "team1": "S4", "team2": "S5", "score": "1:0"},
+        {"round": "Halbfinale 1", "team1": "S1", "team2": "S4", "score": "3:2"},
+        {"round": "Halbfinale 2", "team1": "S7", "team2": "S3", "score": "-"},
+    ]
+    bracket = legacy_bracket(legacy)
+    semis = [bracket["matches"][i] for i in bracket["rounds"][1]]
+    assert [(m["round"], m["team1"], m["team2"], m["score"]) for m in semis] == [
+        ("Halbfinale 1", "S1", "S4", "3:2"),
+        ("Halbfinale 2", "S7", "S3", "-"),
+    ]
+    assert bracket["played"] == 5
+
+    # Die laufende KO-Phase lässt sich zu Ende spielen
+    set_score(bracket, semis[1]["id"], "1:2")
+    set_score(bracket, "P3", "1:0")
+    set_score(bracket, final_match(bracket)["id"], "2:0")
+    assert final_match(bracket)["team2"] == "S3"
+    assert is_finished(bracket)
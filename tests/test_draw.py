@@ -0,0 +1,40 @@
+from draw import draw_groups, player_history, tournament_history
+
+
+def finished_tournament():
+    return {
+        "teams": [
+            {"name": "Alpha", "players": ["Anna", "Ben"]},
+            {"name": "Beta", "players": ["Carl", "Dora"]},
+        ],
+        "group_matches": {"A": [
+            {"team1": "Alpha", "team2": "Beta", "score": "3:1"},
+            {"team1": "Beta", "team2": "Alpha", "score": "2:2"},
+            {"team1": "Alpha", "team2": "Beta", "score": "-"},
+        ]},
+    }
+
+
+def test_summary_counts_points_and_partners():
+    summary = tournament_history(finished_tournament())
+    records, partners = player_history([summary, summary])
+    assert records["Anna"] == [8, 4]
+    assert records["Dora"] == [2, 4]
+    assert partners == {frozenset(["Anna", "Ben"]), frozenset(["Carl", "Dora"])}
+
+
+def test_draw_separates_former_partners_and_balances_groups():
+    history = [tournament_history(finished_tournament())]
+    # Anna und Ben spielen jetzt in verschiedenen Teams und sollen nicht in dieselbe Gruppe
+    teams = [
+        {"name": "T1", "players": ["Anna", "Xaver"]},
+        {"name": "T2", "players": ["Ben", "Yvonne"]},
+        {"name": "T3", "players": ["Carl", "Zoe"]},
+        {"name": "T4", "players": ["Dora", "Emil"]},
+    ]
+    for seed in range(20):
+        groups = draw_groups(teams, ["A", "B"], history, seed=seed)
+        assert sorted(len(members) for members in groups.values()) == [2, 2]
+        for members in groups.values():
+            names = {t["name"] for t in members}
+            assert not {"T1", "T2"} <= names
@@ -0,0 +1,137 @@
+import threading
+import pytest
+import mongo_v1
+from storage import SQLiteStore, WriteBehindCollection
+
+
+def new_tournament():
+    return {
+        "group_matches": {"A": [{"score": None}, {"score": None}]},
+        "progress": {"played": 0, "total": 2}
+    }
+
+
+@pytest.fixture
+def sessions(monkeypatch, tmp_path):
+    # Zwei Sessions mit eigenem saved_snapshots, gemeinsame Collection und gemeinsamer Cache
+    inner = SQLiteStore(str(tmp_path / "test.db")).collection("tournaments")
+    collection = WriteBehindCollection(inner, window=0.05)
+    cache = {"lock": threading.Lock(), "tournaments": {}}
+    snapshots = {"a": {}, "b": {}}
+    current = ["a"]
+    monkeypatch.setattr(mongo_v1, "get_collection", lambda: collection)
+    monkeypatch.setattr(mongo_v1, "get_event_log", lambda: None)
+    monkeypatch.setattr(mongo_v1, "shared_tournament_cache", lambda: cache)
+    monkeypatch.setattr(mongo_v1, "saved_snapshots", lambda: snapshots[current[0]])
+
+    def switch(session):
+        current[0] = session
+
+    yield collection, inner, switch
+    collection.close()
+
+
+def test_write_behind_adds_counters_of_parallel_saves(sessions):
+    collection, inner, switch = sessions
+    switch("a")
+    mongo_v1.save_tournament("Cup", new_tournament())
+    assert collection.flush(timeout=5)
+
+    # Beide Sessions laden denselben Stand und tragen je ein anderes Ergebnis ein
+    first = mongo_v1.load_tournament("Cup")
+    switch("b")
+    second = mongo_v1.load_tournament("Cup")
+
+    switch("a")
+    first["group_matches"]["A"][0]["score"] = "7:5"
+    first["progress"]["played"] = 1
+    mongo_v1.save_tournament("Cup", first)
+    switch("b")
+    second["group_matches"]["A"][1]["score"] = "3:7"
+    second["progress"]["played"] = 1
+    mongo_v1.save_tournament("Cup", second)
+    assert collection.flush(timeout=5)
+
+    data = inner.get(mongo_v1.tournament_id("Cup"))["data"]
+    assert [match["score"] for match in data["group_matches"]["A"]] == ["7:5", "3:7"]
+    assert data["progress"] == {"played": 2, "total": 2}
+
+
+def test_diff_paths_sets_resized_lists_and_unsets_removed_keys():
+    old = {"teams": ["A", "B"], "scores": ["1:0", "-"], "ko_round": {"final": "2:1"}, "mode": "groups"}
+    new = {"teams": ["A", "B", "C"], "scores": ["1:0", "3:2"], "mode": "groups"}
+    sets, unsets = mongo_v1.diff_paths(old, new, "data")
+    assert sets == {"data.teams": ["A", "B", "C"], "data.scores.1": "3:2"}
+    assert unsets == ["data.ko_round"]
+
+    sets, unsets = mongo_v1.diff_paths({"teams": ["A", "B", "C"]}, {"teams": ["A"]}, "data")
+    assert sets == {"data.teams": ["A"]}
+    assert unsets == []
+
+
+def test_conflicting_paths_overlap_between_parent_and_child():
+    # Eigene Änderung im Kind, fremde am Elternpfad (und umgekehrt) -> Konflikt
+    assert mongo_v1.conflicting_paths({"data.groups.A.0": "X"}, [], {"data.groups": {}}, []) == {"data.groups.A.0"}
+    assert mongo_v1.conflicting_paths({}, ["data.groups"], {"data.groups.A.0": "X"}, []) == {"data.groups"}
+    # Gleicher Wert bzw. getrennte Pfade sind kein Konflikt
+    assert mongo_v1.conflicting_paths({"data.a": 1}, [], {"data.a": 1}, []) == set()
+    assert mongo_v1.conflicting_paths({"data.a.b": 1}, [], {"data.ab": 2}, []) == set()
+
+
+class RacingCollection:
+    # Lässt die erste rev-geprüfte Schreibung scheitern, nachdem eine andere Session geschrieben hat
+    def __init__(self, inner, remote_update):
+        self.inner = inner
+        self.remote_update = remote_update
+
+    def get(self, doc_id, fields=None):
+        return self.inner.get(doc_id, fields)
+
+    def update(self, doc_id, expected_rev=None, **kwargs):
+        if expected_rev is not None and self.remote_update is not None:
+            self.inner.update(doc_id, bump_rev=True, **self.remote_update)
+            self.remote_update = None
+        return self.inner.update(doc_id, expected_rev=expected_rev, **kwargs)
+
+
+@pytest.fixture
+def racing(monkeypatch, tmp_path):
+    inner = SQLiteStore(str(tmp_path / "test.db")).collection("tournaments")
+    snapshots = {}
+    monkeypatch.setattr(mongo_v1, "get_event_log", lambda: None)
+    monkeypatch.setattr(mongo_v1, "shared_tournament_cache", lambda: {"lock": threading.Lock(), "tournaments": {}})
+    monkeypatch.setattr(mongo_v1, "saved_snapshots", lambda: snapshots)
+
+    def start(remote_update):
+        collection = RacingCollection(inner, None)
+        monkeypatch.setattr(mongo_v1, "get_collection", lambda: collection)
+        mongo_v1.save_tournament("Cup", new_tournament())
+        tournament = mongo_v1.load_tournament("Cup")
+        collection.remote_update = remote_update
+        return tournament
+
+    return inner, start
+
+
+def test_save_merges_parallel_scores_and_adds_counters(racing):
+    inner, start = racing
+    tournament = start({"sets": {"data.group_matches.A.1.score": "3:7", "data.progress.played": 1}})
+    tournament["group_matches"]["A"][0]["score"] = "7:5"
+    tournament["progress"]["played"] = 1
+    mongo_v1.save_tournament("Cup", tournament)
+
+    doc = inner.get(mongo_v1.tournament_id("Cup"))
+    assert [match["score"] for match in doc["data"]["group_matches"]["A"]] == ["7:5", "3:7"]
+    # merge_counters: fremder Stand 1 + eigene Änderung 1
+    assert doc["data"]["progress"]["played"] == 2
+    assert doc["rev"] == 3
+
+
+def test_save_raises_conflict_on_same_score(racing):
+    inner, start = racing
+    tournament = start({"sets": {"data.group_matches.A.0.score": "3:7"}})
+    tournament["group_matches"]["A"][0]["score"] = "7:5"
+    with pytest.raises(mongo_v1.SaveConflict) as error:
+        mongo_v1.save_tournament("Cup", tournament)
+    assert error.value.paths == {"data.group_matches.A.0.score"}
+    assert inner.get(mongo_v1.tournament_id("Cup"))["data"]["group_matches"]["A"][0]["score"] == "3:7"
@@ -0,0 +1,31 @@
+from itertools import combinations
+from scheduler import build_group_matches, round_robin_rounds, schedule_slots
+
+
+def test_round_robin_plays_every_pair_once():
+    for num_teams in range(2, 12):
+        names = [f"T{i}" for i in range(num_teams)]
+        pairs = [frozenset(p) for r in round_robin_rounds(names) for p in r]
+        assert sorted(pairs, key=sorted) == sorted((frozenset(p) for p in combinations(names, 2)), key=sorted)
+
+
+def test_slots_respect_tables_and_teams():
+    for num_groups in range(1, 5):
+        for group_size in range(2, 8):
+            for num_tables in range(1, 6):
+                groups = {g: [f"{g}{i}" for i in range(group_size)] for g in "ABCD"[:num_groups]}
+                slots = schedule_slots(groups, num_tables)
+                total = num_groups * group_size * (group_size - 1) // 2
+                assert sum(len(slot) for slot in slots) == total
+                for slot in slots:
+                    assert len(slot) <= num_tables
+                    teams = [t for _, t1, t2 in slot for t in (t1, t2)]
+                    assert len(teams) == len(set(teams))
+
+
+def test_group_matches_carry_slot_and_table():
+    matches = build_group_matches({"A": ["a", "b", "c", "d"]}, 2)["A"]
+    assert [m["match_number"] for m in matches] == list(range(1, 7))
+    assert all(1 <= m["table"] <= 2 for m in matches)
+    # Vier Teams an zwei Tischen: drei Runden mit je zwei Spielen
+    assert max(m["slot"] for m in matches) == 3
@@ -0,0 +1,24 @@
+import pytest
+from simulator import berechne_turnierzeit_und_spiele, simulate_tournament
+
+
+@pytest.mark.parametrize("num_groups, teams_per_group, viertelfinale", [(1, 4, False), (2, 4, True), (3, 5, True)])
+def test_without_spread_matches_serial_estimate(num_groups, teams_per_group, viertelfinale):
+    # Ein Tisch, keine Wechselzeit, keine Streuung und kein Golden Goal: alle Spiele laufen nacheinander
+    minutes, matches = berechne_turnierzeit_und_spiele(num_groups, teams_per_group, 8, 14, viertelfinale)
+    result = simulate_tournament(num_groups, teams_per_group, 1, 8, 14, ko_teams=8 if viertelfinale else 4,
+                                 overhead=0, spread=0, golden_goal=0, replications=10, seed=1)
+    assert result["group_matches"] + result["ko_matches"] == matches
+    assert result["p50"] == result["p90"] == result["mean"] == pytest.approx(minutes)
+
+
+def test_percentiles_with_fixed_seed():
+    args = (2, 4, 2, 8, 14)
+    result = simulate_tournament(*args, ko_teams=8, seed=18)
+    # Gleicher Seed -> gleiches Ergebnis
+    assert simulate_tournament(*args, ko_teams=8, seed=18) == result
+
+    # Ohne Streuung: 12 Gruppenspiele auf 2 Tischen = 6 Runden zu 9 Minuten, dann 4 KO-Runden zu 15 Minuten
+    deterministic = simulate_tournament(*args, ko_teams=8, spread=0, golden_goal=0, replications=10)["p50"]
+    assert deterministic == pytest.approx(6 * 9 + 4 * 15)
+    assert deterministic * 0.9 < result["p50"] < result["p90"] < deterministic * 1.3
@@ -0,0 +1,111 @@
+import random
+from standings import STAT_KEYS, GroupStandings, recompute, standings_frame
+
+SCORES = ["-", "None:None", "3:", "a:b", "1:2:3", " 2 : 1", "+1:0", "1_0:2", "0:0"]
+
+
+def loop_standings(team_names, matches):
+    # Frühere Berechnung (update_stats): alle Spiele einzeln durchgehen
+    table = {name: dict.fromkeys(STAT_KEYS, 0) for name in team_names}
+    for match in matches:
+        score = match["score"]
+        if score != "-" and ":" in score:
+            try:
+                s1, s2 = map(int, score.split(":"))
+            except ValueError:
+                continue
+            t1 = table.get(match["team1"])
+            t2 = table.get(match["team2"])
+            if not t1 or not t2:
+                continue
+            t1["games_played"] += 1
+            t2["games_played"] += 1
+            t1["goals_for"] += s1
+            t1["goals_against"] += s2
+            t2["goals_for"] += s2
+            t2["goals_against"] += s1
+            if s1 > s2:
+                t1["points"] += 3
+                t1["wins"] += 1
+                t2["losses"] += 1
+            elif s2 > s1:
+                t2["points"] += 3
+                t2["wins"] += 1
+                t1["losses"] += 1
+            else:
+                t1["points"] += 1
+                t2["points"] += 1
+                t1["draws"] += 1
+                t2["draws"] += 1
+    return table
+
+
+def random_group(rng):
+    team_names = [f"Team {i}" for i in range(rng.randint(1, 8))]
+    candidates = team_names + ["Unbekannt"]
+    matches = []
+    for number in range(rng.randint(0, 30)):
+        if rng.random() < 0.3:
+            score = rng.choice(SCORES)
+        else:
+            score = f"{rng.randint(0, 10)}:{rng.randint(0, 10)}"
+        matches.append({
+            "match_number": number + 1,
+            "team1": rng.choice(candidates),
+            "team2": rng.choice(candidates),
+            "score": score
+        })
+    return team_names, matches
+
+
+def test_vectorized_matches_loop():
+    rng = random.Random(14)
+    for _ in range(2000):
+        team_names, matches = random_group(rng)
+        assert recompute(team_names, matches) == loop_standings(team_names, matches)
+
+
+def test_standings_frame_is_ranked():
+    rng = random.Random(140)
+    for _ in range(300):
+        team_names, matches = random_group(rng)
+        df = standings_frame(team_names, matches)
+        table = loop_standings(team_names, matches)
+        # Frühere Sortierung in render_table: Punkte, Tordifferenz, Tore; stabil bei Gleichstand
+        expected = sorted(team_names, key=lambda name: (
+            -table[name]["points"],
+            -(table[name]["goals_for"] - table[name]["goals_against"]),
+            -table[name]["goals_for"]
+        ))
+        assert list(df["name"]) == expected
+        assert list(df["Rang"]) == list(range(1, len(team_names) + 1))
+        assert list(df["Tordifferenz"]) == [table[n]["goals_for"] - table[n]["goals_against"] for n in expected]
+
+
+def test_incremental_matches_loop_after_corrections():
+    rng = random.Random(13)
+    for _ in range(300):
+        team_names, matches = random_group(rng)
+        standings = GroupStandings(team_names)
+        standings.sync(matches)
+        # Ergebnisse korrigieren und Spiele entfernen, dann erneut abgleichen
+        for match in rng.sample(matches, len(matches) // 2):
+            match["score"] = f"{rng.randint(0, 10)}:{rng.randint(0, 10)}"
+        matches = matches[:rng.randint(0, len(matches))]
+        standings.sync(matches)
+        assert standings.table == loop_standings(team_names, matches)
+
+
+def test_head_to_head_breaks_tie():
+    # B und C haben je 4 Punkte; C hat die bessere Tordifferenz, B den direkten Vergleich gewonnen
+    matches = [
+        {"match_number": 1, "team1": "B", "team2": "C", "score": "1:0"},
+        {"match_number": 2, "team1": "A", "team2": "B", "score": "0:0"},
+        {"match_number": 3, "team1": "C", "team2": "D", "score": "5:0"},
+        {"match_number": 4, "team1": "D", "team2": "B", "score": "1:0"},
+        {"match_number": 5, "team1": "A", "team2": "C", "score": "0:0"},
+        {"match_number": 6, "team1": "A", "team2": "D", "score": "1:0"},
+    ]
+    standings = GroupStandings(["A", "B", "C", "D"])
+    standings.sync(matches)
+    assert standings.ranking() == ["A", "B", "C", "D"]
@@ -0,0 +1,161 @@
+import random
+import pytest
+from storage import (JsonFileStore, SQLiteStore, WriteBehindCollection, apply_incs, apply_paths, is_under,
+                     merge_update)
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def collection(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteStore(str(tmp_path / "test.db"))
+    else:
+        store = JsonFileStore(str(tmp_path / "data"))
+    return store.collection("tournaments")
+
+
+def test_update_checks_expected_rev(collection):
+    assert collection.update("t", sets={"data": {"a": 1}}, bump_rev=True, upsert=True)
+    assert collection.get("t")["rev"] == 1
+
+    # Zweite Session mit veraltetem Stand wird abgewiesen und ändert nichts
+    assert collection.update("t", sets={"data.a": 2}, bump_rev=True, expected_rev=1)
+    assert not collection.update("t", sets={"data.a": 3}, bump_rev=True, expected_rev=1)
+    assert collection.get("t") == {"_id": "t", "data": {"a": 2}, "rev": 2}
+
+
+def test_update_without_rev_field_matches_zero(collection):
+    # Migrierte Dokumente haben noch kein rev-Feld
+    collection.update("t", sets={"data": {}}, upsert=True)
+    assert collection.update("t", sets={"data.a": 1}, bump_rev=True, expected_rev=0)
+    assert collection.get("t", ["rev"]) == {"_id": "t", "rev": 1}
+
+
+def test_update_missing_document(collection):
+    assert not collection.update("t", sets={"data.a": 1}, expected_rev=0)
+    assert collection.get("t") is None
+
+
+def new_update(sets=None, unsets=None, incs=None):
+    return {"sets": sets or {}, "unsets": unsets or [], "incs": incs or {}, "inc": 1, "upsert": False, "attempts": 0}
+
+
+def overlapping(update):
+    paths = list(update["sets"]) + update["unsets"] + list(update["incs"])
+    return [(p, q) for i, p in enumerate(paths) for q in paths[i + 1:] if is_under(p, q) or is_under(q, p)]
+
+
+def without_empty(value):
+    # Leere Dicts entstehen beim schrittweisen Anwenden als Zwischenstufen und zählen nicht
+    if isinstance(value, dict):
+        return {k: without_empty(v) for k, v in value.items() if without_empty(v) != {}}
+    return value
+
+
+def test_merge_folds_child_paths_into_parent():
+    merged = merge_update(new_update(unsets=["data.a.b"]), new_update(sets={"data.a.b.x": 1}))
+    assert merged["sets"] == {"data.a.b": {"x": 1}}
+    assert merged["unsets"] == []
+
+    merged = merge_update(new_update(unsets=["data.a"]), new_update(unsets=["data.a.c"]))
+    assert merged["unsets"] == ["data.a"]
+
+    merged = merge_update(new_update(sets={"data.a": {"b": 1}}), new_update(sets={"data.a.c": 2}))
+    assert merged["sets"] == {"data.a": {"b": 1, "c": 2}}
+
+
+def test_merge_adds_counter_increments():
+    merged = merge_update(new_update(incs={"data.progress.played": 1}), new_update(incs={"data.progress.played": 2}))
+    assert merged["incs"] == {"data.progress.played": 3}
+
+    # Gesetzter Elternwert: Zähler wird direkt im Wert hochgezählt
+    merged = merge_update(new_update(sets={"data.progress": {"played": 4}}), new_update(incs={"data.progress.played": 1}))
+    assert merged["sets"] == {"data.progress": {"played": 5}}
+    assert merged["incs"] == {}
+
+    # Späteres Setzen ersetzt den Zähler
+    merged = merge_update(new_update(incs={"data.progress.played": 1}), new_update(sets={"data.progress": {}}))
+    assert merged["incs"] == {}
+
+
+def test_merge_matches_sequential_updates():
+    rng = random.Random(6)
+
+    def random_path():
+        return "data." + ".".join(rng.choice("abc") for _ in range(rng.randint(1, 3)))
+
+    def random_update():
+        # Wie diff_paths: ein einzelnes Update enthält keine überschneidenden Pfade
+        while True:
+            update = new_update(
+                {random_path(): rng.randint(0, 9) for _ in range(rng.randint(0, 2))},
+                [random_path() for _ in range(rng.randint(0, 2))],
+                {random_path(): rng.randint(-2, 2) for _ in range(rng.randint(0, 1))}
+            )
+            if not overlapping(update):
+                return update
+
+    for _ in range(3000):
+        updates = [random_update() for _ in range(rng.randint(2, 5))]
+        expected = {"data": {}}
+        try:
+            for update in updates:
+                apply_paths(expected, update["sets"], update["unsets"])
+                apply_incs(expected, update["incs"])
+        except (AttributeError, TypeError):
+            # Unterpfad unter einem Zahlenwert, ungültig auch ohne Zusammenfassen
+            continue
+
+        merged = updates[0]
+        for update in updates[1:]:
+            merged = merge_update(merged, update)
+        assert not overlapping(merged)
+        assert merged["inc"] == len(updates)
+
+        result = {"data": {}}
+        apply_paths(result, merged["sets"], merged["unsets"])
+        apply_incs(result, merged["incs"])
+        assert without_empty(result) == without_empty(expected)
+
+
+def test_write_behind_counts_every_coalesced_save(tmp_path):
+    inner = SQLiteStore(str(tmp_path / "test.db")).collection("tournaments")
+    inner.update("t", sets={"data": {"scores": []}}, bump_rev=True, upsert=True)
+
+    collection = WriteBehindCollection(inner, window=0.05)
+    for i in range(5):
+        collection.update("t", sets={f"data.score_{i}": "1:0"}, bump_rev=True)
+    # Lesen sieht die ausstehenden Änderungen schon mit der späteren Revision
+    assert collection.get("t", ["rev"])["rev"] == 6
+    assert collection.flush(timeout=5)
+    collection.close()
+
+    doc = inner.get("t")
+    assert doc["rev"] == 6
+    assert all(doc["data"][f"score_{i}"] == "1:0" for i in range(5))
+
+
+class FailingCollection:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, doc_id, fields=None):
+        return None
+
+    def update(self, *args, **kwargs):
+        self.calls += 1
+        raise RuntimeError("Schreiben abgelehnt")
+
+
+def test_write_behind_drops_update_after_max_attempts(monkeypatch):
+    # Pause nach einem Fehlversuch überspringen
+    monkeypatch.setattr("storage.time.sleep", lambda seconds: None)
+    inner = FailingCollection()
+    collection = WriteBehindCollection(inner, window=0, max_attempts=3)
+    collection.update("t", sets={"data.a": 1}, bump_rev=True)
+    assert collection.flush(timeout=5)
+    collection.close()
+
+    assert inner.calls == 3
+    stats = collection.stats()
+    assert stats["dropped"] == ["t"]
+    assert stats["pending"] == 0
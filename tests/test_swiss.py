@@ -0,0 +1,38 @@
+import random
+from swiss import next_round, swiss_frame
+
+
+def play_round(matches, rng):
+    for match in matches:
+        if not match.get("bye"):
+            match["score"] = f"{rng.randint(0, 5)}:{rng.randint(0, 5)}"
+
+
+def test_no_rematches_and_one_bye_per_team():
+    rng = random.Random(20)
+    for num_teams in (5, 8, 11, 16):
+        names = [f"T{i}" for i in range(num_teams)]
+        rounds = []
+        for _ in range(4):
+            matches = next_round(names, rounds)
+            play_round(matches, rng)
+            rounds.append(matches)
+
+        pairs = [frozenset((m["team1"], m["team2"])) for r in rounds for m in r if not m.get("bye")]
+        assert len(pairs) == len(set(pairs))
+        byes = [m["team1"] for r in rounds for m in r if m.get("bye")]
+        assert len(byes) == len(set(byes)) == (4 if num_teams % 2 else 0)
+        for matches in rounds:
+            teams = [t for m in matches for t in (m["team1"], m["team2"]) if t]
+            assert sorted(teams) == sorted(names)
+
+
+def test_ranking_uses_buchholz():
+    # A und B haben je 3 Punkte; A hatte die stärkeren Gegner (B und C, zusammen 9 Punkte)
+    rounds = [
+        [{"team1": "A", "team2": "B", "score": "1:0"}, {"team1": "C", "team2": "D", "score": "1:0"}],
+        [{"team1": "B", "team2": "D", "score": "1:0"}, {"team1": "A", "team2": "C", "score": "0:1"}],
+    ]
+    df = swiss_frame(["A", "B", "C", "D"], rounds)
+    assert list(df["name"]) == ["C", "A", "B", "D"]
+    assert list(df["buchholz"]) == [3, 9, 3, 9]
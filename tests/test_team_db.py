@@ -0,0 +1,56 @@
+import io
+import pytest
+from team_db import import_teams, teams_from_csv
+
+
+def csv_file(text, encoding="utf-8"):
+    return io.BytesIO(text.encode(encoding))
+
+
+@pytest.mark.parametrize("text", [
+    "name,player_1,player_2\nBlau,Anna,Ben\n",
+    "Team;Spieler_1;Spieler_2\nBlau;Anna;Ben\n",
+    # UTF-8 mit BOM, z.B. aus Excel
+    "\ufeffTEAMNAME;Spieler1;Spieler2\nBlau;Anna;Ben\n",
+    " Teamname , Player1 , Player2 \nBlau, Anna ,Ben\n",
+])
+def test_header_variants(text):
+    rows, rejected = teams_from_csv(csv_file(text))
+    assert rows == [("Blau", "Anna", "Ben")]
+    assert rejected == []
+
+
+def test_excel_umlauts_in_cp1252():
+    rows, _ = teams_from_csv(csv_file("team;spieler_1;spieler_2\nMünchen;Jörg;Ütz\n", "cp1252"))
+    assert rows == [("München", "Jörg", "Ütz")]
+
+
+def test_blank_and_missing_players_are_rejected():
+    text = "team,player_1,player_2\nBlau,Anna,Ben\nRot,,Carla\nGrün,Dora\n  ,Emil,Fritz\nGelb,Gabi,Hans\n"
+    rows, rejected = teams_from_csv(csv_file(text))
+    assert rows == [("Blau", "Anna", "Ben"), ("Gelb", "Gabi", "Hans")]
+    # Zeilennummern wie in der Datei (Zeile 1 = Kopfzeile)
+    assert rejected == [3, 4, 5]
+
+
+def test_missing_column_and_empty_file():
+    with pytest.raises(ValueError, match="player_2"):
+        teams_from_csv(csv_file("team,player_1\nBlau,Anna\n"))
+    with pytest.raises(ValueError, match="leer"):
+        teams_from_csv(csv_file("  \n"))
+
+
+def test_reimport_skips_existing_teams():
+    text = "team,player_1,player_2\nBlau,Anna,Ben\nRot,Carla,Dora\nblau ,Emil,Fritz\n"
+    rows, _ = teams_from_csv(csv_file(text))
+    teams, added, skipped = import_teams([], rows)
+    # Doppelter Name in derselben Datei (Groß-/Kleinschreibung, Leerzeichen egal)
+    assert [t["name"] for t in teams] == ["Blau", "Rot"]
+    assert added == 2
+    assert skipped == ["blau"]
+
+    # Dieselbe Datei noch einmal: nichts Neues
+    again, added, skipped = import_teams(teams, rows)
+    assert again == teams
+    assert added == 0
+    assert skipped == ["Blau", "Rot", "blau"]